@@ -1,4 +1,4 @@
 # medical_chatbot/src/__init__.py
 
-from .data_processing import load_dataset, preprocess_data
+from .data_processing import load_dataset, load_knowledge_base, preprocess_data
 from .chatbot_model import MedicalChatbot
\ No newline at end of file
@@ -1,12 +1,211 @@
+import hashlib
+import os
 import re
+import sys
+import threading
+import time
+from functools import lru_cache
+
 import numpy as np
-from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
-from rapidfuzz import fuzz
-from langdetect import detect
+from langdetect import DetectorFactory, detect
+
+from embeddings import load_embedding_model
+from matchers import FuzzyMatcher, IllnessMatcher
+
+MODEL_NAME = 'paraphrase-multilingual-MiniLM-L12-v2'
+CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'cache')
+
+# Seuil de similarité cosinus pour la recherche sémantique
+SIMILARITY_THRESHOLD = 0.7
+
+# Chargement du modèle d'embeddings : à la construction ('eager'), dans un
+# thread dès la construction ('background') ou à la première requête qui en
+# a besoin ('lazy').  Les réponses lexicales n'attendent jamais le modèle.
+PRELOAD_MODES = ('eager', 'background', 'lazy')
+
+# Après un échec de chargement du modèle, nouvel essai au plus tôt après ce
+# délai, doublé à chaque échec jusqu'au plafond
+MODEL_RETRY_S = float(os.getenv('CHATBOT_MODEL_RETRY_S', '30'))
+MODEL_RETRY_MAX_S = float(os.getenv('CHATBOT_MODEL_RETRY_MAX_S', '900'))
+
+SUPPORTED_LANGUAGES = ('en', 'fr', 'ar')
+
+# Mots vides multilingues
+STOP_WORDS = {
+    'en': ['i', 'have', 'my', 'a', 'the', 'of', 'for', 'with'],
+    'fr': ['j', 'ai', 'je', 'à', 'la', 'le', 'de', 'des', 'du', 'une', 'un'],
+    'ar': ['أنا', 'لدي', 'عندي', 'في', 'مع', 'من', 'إلى']
+}
+
+# Une seule alternance précompilée par langue
+STOP_WORD_PATTERNS = {
+    lang: re.compile(r'\b(?:' + '|'.join(re.escape(w) for w in words) + r')\b')
+    for lang, words in STOP_WORDS.items()
+}
+
+# Extraction multi-symptômes : propositions séparées par la ponctuation ou
+# une conjonction, puis n-grammes de mots
+TOP_K_SYMPTOMS = 5
+FUZZY_THRESHOLD = 90
+CLAUSE_SEPARATORS = {'and', 'or', 'also', 'plus', 'but', 'et', 'ou', 'aussi', 'mais', 'avec', 'و', 'أو', 'ثم'}
+CLAUSE_BREAK = re.compile(r'[,;.!?،؛]')
+WORD = re.compile(r"\w+(?:['’-]\w+)*")
+
+ARABIC_CHARS = re.compile('[\u0600-\u06FF\u0750-\u077F\u08A0-\u08FF\uFB50-\uFDFF\uFE70-\uFEFF]')
+
+# langdetect est non déterministe sans graine
+DetectorFactory.seed = 0
+
+# Messages de réponse selon la langue
+MESSAGES = {
+    'en': {
+        'illness_response': "For the illness '{illness}', the recommended medications are: {meds}. Please consult a doctor for confirmation.",
+        'serious_illness_response': "The illness '{illness}' may be serious. Please consult a {specialty} as soon as possible.",
+        'serious_response': "The symptom '{symptom}' may be serious. Please consult a {specialty} as soon as possible.",
+        'medication_response': "For the symptom '{symptom}', the recommended medications are: {meds}. Please consult a doctor for confirmation.",
+        'not_understood': "I didn't understand what you mean.",
+        'symptoms_list': "Recognized symptoms: {symptoms}",
+        'symptoms_found': "Recognized symptoms: {symptoms}.",
+        'multi_serious_response': "Some of these symptoms may be serious. Please consult a {specialties} as soon as possible.",
+        'multi_medication_response': "Recommended medications: {meds}. Please consult a doctor for confirmation."
+    },
+    'fr': {
+        'illness_response': "Pour la maladie '{illness}', les médicaments recommandés sont : {meds}. Veuillez consulter un médecin pour confirmation.",
+        'serious_illness_response': "La maladie '{illness}' peut être grave. Veuillez consulter un {specialty} dès que possible.",
+        'serious_response': "Le symptôme '{symptom}' peut être grave. Veuillez consulter un {specialty} dès que possible.",
+        'medication_response': "Pour le symptôme '{symptom}', les médicaments recommandés sont : {meds}. Veuillez consulter un médecin pour confirmation.",
+        'not_understood': "Je n'ai pas compris ce que vous voulez dire.",
+        'symptoms_list': "Symptômes reconnus : {symptoms}",
+        'symptoms_found': "Symptômes reconnus : {symptoms}.",
+        'multi_serious_response': "Certains de ces symptômes peuvent être graves. Veuillez consulter un {specialties} dès que possible.",
+        'multi_medication_response': "Médicaments recommandés : {meds}. Veuillez consulter un médecin pour confirmation."
+    },
+    'ar': {
+        'illness_response': "بالنسبة للمرض '{illness}'، الأدوية الموصى بها هي: {meds}. يرجى استشارة طبيب للتأكيد.",
+        'serious_illness_response': "المرض '{illness}' قد يكون خطيرًا. يرجى استشارة {specialty} في أقرب وقت ممكن.",
+        'serious_response': "العرض '{symptom}' قد يكون خطيرًا. يرجى استشارة {specialty} في أقرب وقت ممكن.",
+        'medication_response': "بالنسبة للعرض '{symptom}'، الأدوية الموصى بها هي: {meds}. يرجى استشارة طبيب للتأكيد.",
+        'not_understood': "لم أفهم ما تقصده.",
+        'symptoms_list': "الأعراض المعترف بها: {symptoms}",
+        'symptoms_found': "الأعراض المعترف بها: {symptoms}.",
+        'multi_serious_response': "بعض هذه الأعراض قد يكون خطيرًا. يرجى استشارة {specialties} في أقرب وقت ممكن.",
+        'multi_medication_response': "الأدوية الموصى بها: {meds}. يرجى استشارة طبيب للتأكيد."
+    }
+}
+
+
+@lru_cache(maxsize=4096)
+def detect_language(query):
+    """
+    Détecte la langue de la requête ('en', 'fr' ou 'ar', 'en' par défaut).
+    Les textes majoritairement en écriture arabe sont reconnus sans langdetect.
+    """
+    letters = sum(1 for c in query if c.isalpha())
+    if letters and len(ARABIC_CHARS.findall(query)) * 2 > letters:
+        return 'ar'
+    try:
+        lang = detect(query)
+    except Exception:
+        return 'en'
+    return lang if lang in SUPPORTED_LANGUAGES else 'en'
+
+
+def segment_query(cleaned_query, max_words):
+    """
+    Découpe une requête nettoyée en propositions (ponctuation, conjonctions)
+    puis en n-grammes candidats d'au plus ``max_words`` mots.  Une
+    proposition plus longue est aussi candidate entière, pour la recherche
+    sémantique.  Le nombre de candidats est linéaire en la longueur de la
+    requête.
+    Args:
+        cleaned_query (str): Requête nettoyée.
+        max_words (int): Nombre de mots du plus long symptôme.
+    Returns:
+        list: Triplets (début, fin, texte), positions en mots (fin exclue).
+    """
+    clauses, words = [], []
+    for chunk in CLAUSE_BREAK.split(cleaned_query):
+        clause = []
+        for word in WORD.findall(chunk):
+            if word in CLAUSE_SEPARATORS:
+                clauses.append(clause)
+                clause = []
+            else:
+                clause.append(len(words))
+                words.append(word)
+        clauses.append(clause)
+
+    spans = []
+    for clause in clauses:
+        for i, start in enumerate(clause):
+            for end in clause[i:i + max_words]:
+                spans.append((start, end + 1, ' '.join(words[start:end + 1])))
+        if len(clause) > max_words:
+            spans.append((clause[0], clause[-1] + 1, ' '.join(words[clause[0]:clause[-1] + 1])))
+    return spans
+
+
+class SymptomIndex:
+    """
+    Index des embeddings de symptômes normalisés (float32, éventuellement
+    memory-mapped).  Le produit scalaire donne directement la similarité
+    cosinus ; la recherche top-k utilise argpartition.
+    """
+
+    def __init__(self, embeddings):
+        self.embeddings = embeddings
+
+    def search(self, query_embeddings, k=1):
+        """
+        Args:
+            query_embeddings (np.ndarray): Requêtes normalisées, forme (m, d).
+            k (int): Nombre de symptômes à retourner par requête.
+        Returns:
+            tuple: (indices, scores), formes (m, k), triés par score décroissant.
+        """
+        scores = np.asarray(query_embeddings, dtype=np.float32) @ self.embeddings.T
+        k = min(k, scores.shape[1])
+        if k < scores.shape[1]:
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        else:
+            top = np.tile(np.arange(scores.shape[1]), (scores.shape[0], 1))
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind='stable')
+        return np.take_along_axis(top, order, axis=1), np.take_along_axis(top_scores, order, axis=1)
+
+
+def load_symptom_embeddings(model, symptoms_list, model_name=MODEL_NAME, cache_dir=CACHE_DIR):
+    """
+    Charge les embeddings normalisés des symptômes depuis le cache .npy
+    (memory-mapped), ou les calcule et les enregistre s'ils sont absents.
+    La clé combine le nom du modèle et un hash de la liste des symptômes.
+    """
+    digest = hashlib.sha256('\n'.join(symptoms_list).encode('utf-8')).hexdigest()[:16]
+    slug = re.sub(r'[^A-Za-z0-9_.-]+', '_', model_name)
+    path = os.path.join(cache_dir, f'symptoms-{slug}-{digest}.npy')
+
+    if os.path.isfile(path):
+        try:
+            embeddings = np.load(path, mmap_mode='r')
+            if embeddings.shape[0] == len(symptoms_list):
+                return embeddings
+        except (OSError, ValueError):
+            pass
+
+    embeddings = model.encode(
+        symptoms_list, convert_to_numpy=True, normalize_embeddings=True
+    ).astype(np.float32)
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.tmp.npy'
+    np.save(tmp_path, embeddings)
+    os.replace(tmp_path, path)
+    return np.load(path, mmap_mode='r')
+
 
 class MedicalChatbot:
-    def __init__(self, symptom_to_response, illness_to_med, symptoms_list, serious_symptom_to_doctor, illness_to_serious_info):
+    def __init__(self, symptom_to_response, illness_to_med, symptoms_list, serious_symptom_to_doctor, illness_to_serious_info,
+                 model_name=MODEL_NAME, cache_dir=CACHE_DIR, backend=None, model_dir=None, threads=None,
+                 preload='eager'):
         """
         Initialise le chatbot médical avec un modèle ML multilingue.
         Args:
@@ -15,25 +214,109 @@ class MedicalChatbot:
             symptoms_list (list): Liste des symptômes disponibles.
             serious_symptom_to_doctor (dict): Mapping des symptômes graves aux spécialités médicales.
             illness_to_serious_info (dict): Mapping des maladies aux informations de gravité.
+            model_name (str): Modèle SentenceTransformer à utiliser.
+            cache_dir (str): Dossier du cache des embeddings de symptômes.
+            backend (str): Backend d'embeddings (voir embeddings.BACKENDS).
+            model_dir (str): Dossier local du modèle, pour un chargement hors ligne.
+            threads (int): Threads d'inférence du backend.
+            preload (str): Chargement du modèle (voir PRELOAD_MODES).
         """
+        if preload not in PRELOAD_MODES:
+            raise ValueError(f"Mode de chargement inconnu : {preload} (attendu : {', '.join(PRELOAD_MODES)})")
         self.symptom_to_response = symptom_to_response
         self.illness_to_med = illness_to_med
         self.symptoms_list = symptoms_list
         self.serious_symptom_to_doctor = serious_symptom_to_doctor
         self.illness_to_serious_info = illness_to_serious_info
         
-        # Mots vides multilingues
-        self.stop_words = {
-            'en': ['i', 'have', 'my', 'a', 'the', 'of', 'for', 'with'],
-            'fr': ['j', 'ai', 'je', 'à', 'la', 'le', 'de', 'des', 'du', 'une', 'un'],
-            'ar': ['أنا', 'لدي', 'عندي', 'في', 'مع', 'من', 'إلى']
+        self.stop_words = STOP_WORDS
+
+        # Matchers lexicaux précompilés : disponibles immédiatement
+        self.illness_matcher = IllnessMatcher(self.illness_to_med)
+        self.symptom_matcher = FuzzyMatcher(self.symptoms_list)
+        # Recherche exacte des n-grammes (extraction multi-symptômes)
+        self._symptom_ids = {}
+        for i, symptom in enumerate(self.symptoms_list):
+            self._symptom_ids.setdefault(symptom, i)
+        self._max_symptom_words = max((len(s.split()) for s in self.symptoms_list), default=1)
+
+        # Repli sémantique : modèle, embeddings des symptômes et index
+        self._model_options = (model_name, backend, model_dir, threads, cache_dir)
+        self.model = None
+        self.symptom_embeddings = None
+        self.symptom_index = None
+        self.semantic_error = None
+        self.semantic_failures = 0
+        self._semantic_retry_at = 0.0
+        self._semantic_lock = threading.Lock()
+        if preload == 'eager':
+            self.load_semantic(raise_errors=True)
+        elif preload == 'background':
+            threading.Thread(target=self.load_semantic, name='chatbot-model', daemon=True).start()
+
+    def load_semantic(self, raise_errors=False):
+        """
+        Charge le modèle d'embeddings et l'index des symptômes (une seule
+        fois ; les appels concurrents attendent le premier).  Après un échec,
+        ``semantic_error`` est renseigné et le chargement est retenté au plus
+        tôt après MODEL_RETRY_S secondes (délai doublé à chaque échec).
+        Args:
+            raise_errors (bool): Propager l'erreur de chargement au lieu de la journaliser.
+        Returns:
+            bool: True si le repli sémantique est disponible.
+        """
+        with self._semantic_lock:
+            if self.symptom_index is not None:
+                return True
+            if self.semantic_error is not None and time.monotonic() < self._semantic_retry_at:
+                return False
+            model_name, backend, model_dir, threads, cache_dir = self._model_options
+            try:
+                model = load_embedding_model(model_name, backend, model_dir, threads, cache_dir)
+                # Embeddings des symptômes (cache .npy memory-mapped, un par backend)
+                embeddings = load_symptom_embeddings(model, self.symptoms_list, model.cache_key, cache_dir)
+            except Exception as exc:
+                if raise_errors:
+                    raise
+                self.semantic_error = f"{type(exc).__name__}: {exc}"
+                delay = min(MODEL_RETRY_S * 2 ** self.semantic_failures, MODEL_RETRY_MAX_S)
+                self.semantic_failures += 1
+                self._semantic_retry_at = time.monotonic() + delay
+                print(f"Recherche sémantique indisponible (nouvel essai dans {delay:.0f} s) : "
+                      f"{self.semantic_error}", file=sys.stderr)
+                return False
+            self.model = model
+            self.symptom_embeddings = embeddings
+            self.symptom_index = SymptomIndex(embeddings)
+            self.semantic_error = None
+            return True
+
+    def semantic_status(self):
+        """
+        État du repli sémantique.
+        Returns:
+            dict: loaded, degraded (dernier chargement en échec), error,
+                  failures et délai avant le prochain essai.
+        """
+        # sans le verrou : il est tenu pendant tout un chargement
+        error = self.semantic_error
+        return {
+            'loaded': self.symptom_index is not None,
+            'degraded': error is not None,
+            'error': error,
+            'failures': self.semantic_failures,
+            'retry_in_s': round(max(self._semantic_retry_at - time.monotonic(), 0.0), 1) if error else None,
         }
-        
-        # Charger le modèle SentenceTransformer multilingue
-        self.model = SentenceTransformer('paraphrase-multilingual-MiniLM-L12-v2')
-        
-        # Calculer les embeddings des symptômes
-        self.symptom_embeddings = self.model.encode(self.symptoms_list, convert_to_tensor=False)
+
+    def list_symptoms(self, lang='en'):
+        """
+        Réponse à la commande 'symptoms' : les symptômes reconnus.
+        Args:
+            lang (str): Langue du message.
+        Returns:
+            str: Liste des symptômes.
+        """
+        return MESSAGES[lang]['symptoms_list'].format(symptoms=', '.join(self.symptoms_list))
 
     def detect_language(self, query):
         """
@@ -43,13 +326,7 @@ class MedicalChatbot:
         Returns:
             str: Code de langue ('en', 'fr', 'ar').
         """
-        try:
-            lang = detect(query)
-            if lang in ['en', 'fr', 'ar']:
-                return lang
-            return 'en'  # Par défaut
-        except:
-            return 'en'
+        return detect_language(query)
 
     def preprocess_query(self, query, lang):
         """
@@ -61,29 +338,242 @@ class MedicalChatbot:
             str: Requête nettoyée.
         """
         query = query.lower().strip()
-        stop_words = self.stop_words.get(lang, self.stop_words['en'])
-        
-        # Supprimer les mots vides
-        for stop_word in stop_words:
-            query = re.sub(r'\b' + stop_word + r'\b', '', query)
-        query = ' '.join(query.split())
-        return query
+        pattern = STOP_WORD_PATTERNS.get(lang, STOP_WORD_PATTERNS['en'])
+        return ' '.join(pattern.sub('', query).split())
 
-    def fuzzy_match(self, query, candidates, threshold=90):
+    def normalize(self, query):
+        """
+        Étape de normalisation : langue détectée et requête nettoyée.
+        Args:
+            query (str): Requête de l'utilisateur.
+        Returns:
+            tuple: (langue, requête nettoyée).
+        """
+        lang = self.detect_language(query)
+        return lang, self.preprocess_query(query, lang)
+
+    def fuzzy_match(self, query, candidates=None, threshold=90):
         """
         Recherche floue pour corriger les fautes d'orthographe.
         Args:
             query (str): Requête de l'utilisateur.
-            candidates (list): Liste des symptômes possibles.
+            candidates (list): Liste des symptômes possibles (par défaut, tous les symptômes).
             threshold (int): Seuil de similarité pour accepter une correspondance.
         Returns:
             str or None: Symptôme correspondant ou None si aucune correspondance.
         """
-        for candidate in candidates:
-            if fuzz.ratio(query, candidate) > threshold:
-                return candidate
+        if candidates is None or candidates is self.symptoms_list:
+            return self.symptom_matcher.match(query, threshold)
+        return FuzzyMatcher(candidates).match(query, threshold)
+
+    def _symptom_response(self, symptom, lang):
+        """Réponse pour un symptôme reconnu (médecin ou médicaments)."""
+        med_info = self.symptom_to_response[symptom]
+        if med_info['type'] == 'doctor':
+            return MESSAGES[lang]['serious_response'].format(symptom=symptom, specialty=med_info['response'])
+        return MESSAGES[lang]['medication_response'].format(symptom=symptom, meds=', '.join(med_info['response']))
+
+    def _illness_response(self, illness, lang):
+        """Réponse pour une maladie reconnue (médecin ou médicaments)."""
+        serious_info = self.illness_to_serious_info.get(illness, {'serious': False, 'specialty': None})
+        if serious_info['serious']:
+            return MESSAGES[lang]['serious_illness_response'].format(illness=illness, specialty=serious_info['specialty'])
+        medications = self.illness_to_med[illness]
+        return MESSAGES[lang]['illness_response'].format(illness=illness, meds=', '.join(medications))
+
+    def _lexical_response(self, cleaned_query, lang):
+        """
+        Réponse par recherche exacte des maladies puis recherche floue des
+        symptômes, ou None si aucune ne correspond.
+        """
+        # Vérifier les maladies (recherche exacte)
+        illness = self.illness_matcher.find(cleaned_query)
+        if illness is not None:
+            return self._illness_response(illness, lang)
+
+        # Recherche floue pour corriger les fautes
+        fuzzy_match = self.fuzzy_match(cleaned_query)
+        if fuzzy_match:
+            return self._symptom_response(fuzzy_match, lang)
         return None
 
+    def process_queries(self, queries):
+        """
+        Traite plusieurs requêtes ; les requêtes sans correspondance lexicale
+        sont encodées en un seul appel au modèle.
+        Args:
+            queries (list): Requêtes de l'utilisateur.
+        Returns:
+            list: Réponses du chatbot, dans le même ordre.
+        """
+        # Détecter la langue et prétraiter chaque requête
+        return self.respond([self.normalize(query) for query in queries])
+
+    def respond(self, normalized):
+        """
+        Réponses à des requêtes déjà normalisées.  La réponse ne dépend que
+        du couple (langue, requête nettoyée), qui sert aussi de clé de cache.
+        Args:
+            normalized (list): Couples (langue, requête nettoyée).
+        Returns:
+            list: Réponses du chatbot, dans le même ordre.
+        """
+        langs = [lang for lang, _ in normalized]
+        cleaned = [cleaned_query for _, cleaned_query in normalized]
+        responses = [self._lexical_response(q, lang) for lang, q in normalized]
+
+        pending = [i for i, response in enumerate(responses) if response is None]
+        if pending and not self.load_semantic():
+            # Modèle indisponible : seules les réponses lexicales sont possibles
+            for i in pending:
+                responses[i] = MESSAGES[langs[i]]['not_understood']
+        elif pending:
+            # Embeddings normalisés des requêtes, en un seul batch
+            query_embeddings = self.model.encode(
+                [cleaned[i] for i in pending], convert_to_numpy=True, normalize_embeddings=True
+            )
+            best_idx, best_scores = self.symptom_index.search(query_embeddings, k=1)
+            for row, i in enumerate(pending):
+                # Seuil de similarité plus strict
+                if best_scores[row, 0] > SIMILARITY_THRESHOLD:
+                    best_sym = self.symptoms_list[best_idx[row, 0]]
+                    responses[i] = self._symptom_response(best_sym, langs[i])
+                else:
+                    # Si aucune correspondance pertinente, répondre "Je n'ai pas compris"
+                    responses[i] = MESSAGES[langs[i]]['not_understood']
+        return responses
+
+    def _exact_symptom(self, text):
+        """Indice du symptôme égal au n-gramme (préfixe arabe « و » toléré), ou None."""
+        idx = self._symptom_ids.get(text)
+        if idx is None and text.startswith('و') and len(text) > 2:
+            idx = self._symptom_ids.get(text[1:])
+        return idx
+
+    def extract_symptoms(self, normalized, k=TOP_K_SYMPTOMS):
+        """
+        Extraction de tous les symptômes d'une phrase ("fever and cough and
+        dizziness") au lieu de la première correspondance.  Chaque requête
+        est découpée en n-grammes (voir ``segment_query``) :
+        recherche exacte par dictionnaire, puis floue en un seul ``cdist``,
+        puis sémantique pour les mots restants, en un seul ``model.encode``
+        pour toutes les requêtes.  Les correspondances qui se chevauchent
+        sont départagées par score.
+        Args:
+            normalized (list): Couples (langue, requête nettoyée).
+            k (int): Nombre maximal de symptômes retenus par requête.
+        Returns:
+            list: Un dictionnaire par requête : symptômes (score, type de
+                  correspondance, texte), maladie, médicaments et spécialités
+                  agrégés, et réponse.
+        """
+        if k < 1:
+            raise ValueError(f"k doit être >= 1 (reçu : {k})")
+        spans = [segment_query(q, self._max_symptom_words) for _, q in normalized]
+        # candidats : (score, longueur, début, fin, indice du symptôme, type, texte)
+        candidates = [[] for _ in normalized]
+
+        # 1. Recherche exacte, puis floue pour les n-grammes restants
+        fuzzy = []
+        for qi, query_spans in enumerate(spans):
+            for start, end, text in query_spans:
+                idx = self._exact_symptom(text)
+                if idx is not None:
+                    candidates[qi].append((1.0, end - start, start, end, idx, 'exact', text))
+                elif end - start <= self._max_symptom_words:
+                    fuzzy.append((qi, start, end, text))
+        best, scores = self.symptom_matcher.best_matches([t for *_, t in fuzzy], FUZZY_THRESHOLD)
+        for (qi, start, end, text), idx, score in zip(fuzzy, best, scores):
+            if idx >= 0:
+                candidates[qi].append((float(score) / 100, end - start, start, end, int(idx), 'fuzzy', text))
+
+        # 2. Recherche sémantique des n-grammes sans correspondance lexicale
+        semantic = []
+        for qi, query_spans in enumerate(spans):
+            covered = set()
+            for _, _, start, end, *_ in candidates[qi]:
+                covered.update(range(start, end))
+            semantic.extend((qi, start, end, text) for start, end, text in query_spans
+                            if covered.isdisjoint(range(start, end)))
+        if semantic and self.load_semantic():
+            texts = list(dict.fromkeys(t for *_, t in semantic))
+            query_embeddings = self.model.encode(texts, convert_to_numpy=True, normalize_embeddings=True)
+            best, scores = self.symptom_index.search(query_embeddings, k=1)
+            row = {text: i for i, text in enumerate(texts)}
+            for qi, start, end, text in semantic:
+                score = float(scores[row[text], 0])
+                if score > SIMILARITY_THRESHOLD:
+                    candidates[qi].append((score, end - start, start, end, int(best[row[text], 0]), 'semantic', text))
+
+        return [self._rank_symptoms(lang, cleaned_query, found, k)
+                for (lang, cleaned_query), found in zip(normalized, candidates)]
+
+    def _rank_symptoms(self, lang, cleaned_query, candidates, k):
+        """
+        Sélection gloutonne des meilleurs candidats sans chevauchement, puis
+        agrégation des médicaments (par fréquence) et des spécialités.
+        """
+        used, seen, selected = set(), set(), []
+        for score, _, start, end, idx, match, text in sorted(candidates, key=lambda c: (-c[0], -c[1], c[2])):
+            symptom = self.symptoms_list[idx]
+            if symptom in seen or not used.isdisjoint(range(start, end)):
+                continue
+            used.update(range(start, end))
+            seen.add(symptom)
+            selected.append((-score, start, symptom, match, text))
+            if len(selected) == k:
+                break
+        # à score égal, dans l'ordre de la phrase
+        symptoms = [{'symptom': symptom, 'score': round(-score, 4), 'match': match, 'text': text}
+                    for score, _, symptom, match, text in sorted(selected)]
+
+        medications, specialties = {}, []
+        for item in symptoms:
+            med_info = self.symptom_to_response.get(item['symptom'])
+            if med_info is None:
+                continue
+            if med_info['type'] == 'doctor':
+                if med_info['response'] not in specialties:
+                    specialties.append(med_info['response'])
+            else:
+                for med in med_info['response']:
+                    medications[med] = medications.get(med, 0) + 1
+        medications = sorted(medications, key=medications.get, reverse=True)
+        illness = self.illness_matcher.find(cleaned_query)
+
+        return {
+            'lang': lang,
+            'symptoms': symptoms,
+            'illness': illness,
+            'medications': medications,
+            'specialties': specialties,
+            'response': self._multi_response(lang, symptoms, illness, medications, specialties),
+        }
+
+    def _multi_response(self, lang, symptoms, illness, medications, specialties):
+        """Réponse agrégée ; un seul symptôme garde la réponse habituelle."""
+        messages = MESSAGES[lang]
+        parts = [self._illness_response(illness, lang)] if illness is not None else []
+        if len(symptoms) == 1:
+            parts.append(self._symptom_response(symptoms[0]['symptom'], lang))
+        elif symptoms:
+            parts.append(messages['symptoms_found'].format(symptoms=', '.join(s['symptom'] for s in symptoms)))
+            if specialties:
+                parts.append(messages['multi_serious_response'].format(specialties=' / '.join(specialties)))
+            if medications:
+                parts.append(messages['multi_medication_response'].format(meds=', '.join(medications)))
+        return ' '.join(parts) if parts else messages['not_understood']
+
+    def respond_multi(self, normalized):
+        """
+        Comme ``respond``, avec l'extraction multi-symptômes.
+        Args:
+            normalized (list): Couples (langue, requête nettoyée).
+        Returns:
+            list: Réponses du chatbot, dans le même ordre.
+        """
+        return [result['response'] for result in self.extract_symptoms(normalized)]
+
     def process_query(self, query):
         """
         Traite la requête de l'utilisateur en utilisant la similarité sémantique et la recherche floue.
@@ -92,77 +582,4 @@ class MedicalChatbot:
         Returns:
             str: Réponse du chatbot.
         """
-        # Détecter la langue
-        lang = self.detect_language(query)
-        
-        # Prétraiter la requête
-        cleaned_query = self.preprocess_query(query, lang)
-        
-        # Messages de réponse selon la langue
-        messages = {
-            'en': {
-                'illness_response': "For the illness '{illness}', the recommended medications are: {meds}. Please consult a doctor for confirmation.",
-                'serious_illness_response': "The illness '{illness}' may be serious. Please consult a {specialty} as soon as possible.",
-                'serious_response': "The symptom '{symptom}' may be serious. Please consult a {specialty} as soon as possible.",
-                'medication_response': "For the symptom '{symptom}', the recommended medications are: {meds}. Please consult a doctor for confirmation.",
-                'not_understood': "I didn't understand what you mean.",
-                'symptoms_list': "Recognized symptoms: {symptoms}"
-            },
-            'fr': {
-                'illness_response': "Pour la maladie '{illness}', les médicaments recommandés sont : {meds}. Veuillez consulter un médecin pour confirmation.",
-                'serious_illness_response': "La maladie '{illness}' peut être grave. Veuillez consulter un {specialty} dès que possible.",
-                'serious_response': "Le symptôme '{symptom}' peut être grave. Veuillez consulter un {specialty} dès que possible.",
-                'medication_response': "Pour le symptôme '{symptom}', les médicaments recommandés sont : {meds}. Veuillez consulter un médecin pour confirmation.",
-                'not_understood': "Je n'ai pas compris ce que vous voulez dire.",
-                'symptoms_list': "Symptômes reconnus : {symptoms}"
-            },
-            'ar': {
-                'illness_response': "بالنسبة للمرض '{illness}'، الأدوية الموصى بها هي: {meds}. يرجى استشارة طبيب للتأكيد.",
-                'serious_illness_response': "المرض '{illness}' قد يكون خطيرًا. يرجى استشارة {specialty} في أقرب وقت ممكن.",
-                'serious_response': "العرض '{symptom}' قد يكون خطيرًا. يرجى استشارة {specialty} في أقرب وقت ممكن.",
-                'medication_response': "بالنسبة للعرض '{symptom}'، الأدوية الموصى بها هي: {meds}. يرجى استشارة طبيب للتأكيد.",
-                'not_understood': "لم أفهم ما تقصده.",
-                'symptoms_list': "الأعراض المعترف بها: {symptoms}"
-            }
-        }
-        
-        # Vérifier les maladies (recherche exacte)
-        for illness in self.illness_to_med:
-            if illness in cleaned_query:
-                serious_info = self.illness_to_serious_info.get(illness, {'serious': False, 'specialty': None})
-                if serious_info['serious']:
-                    return messages[lang]['serious_illness_response'].format(illness=illness, specialty=serious_info['specialty'])
-                medications = self.illness_to_med[illness]
-                return messages[lang]['illness_response'].format(illness=illness, meds=', '.join(medications))
-        
-        # Recherche floue pour corriger les fautes
-        fuzzy_match = self.fuzzy_match(cleaned_query, self.symptoms_list)
-        if fuzzy_match:
-            med_info = self.symptom_to_response[fuzzy_match]
-            best_sym = fuzzy_match
-            if med_info['type'] == 'doctor':
-                return messages[lang]['serious_response'].format(symptom=best_sym, specialty=med_info['response'])
-            else:
-                return messages[lang]['medication_response'].format(symptom=best_sym, meds=', '.join(med_info['response']))
-        
-        # Calculer l'embedding de la requête
-        query_embedding = self.model.encode([cleaned_query], convert_to_tensor=False)
-        
-        # Calculer la similarité cosinus
-        similarities = cosine_similarity(query_embedding, self.symptom_embeddings)[0]
-        
-        # Trouver le symptôme le plus similaire
-        max_similarity_idx = np.argmax(similarities)
-        max_similarity = similarities[max_similarity_idx]
-        
-        # Seuil de similarité plus strict
-        if max_similarity > 0.7:
-            best_sym = self.symptoms_list[max_similarity_idx]
-            med_info = self.symptom_to_response[best_sym]
-            if med_info['type'] == 'doctor':
-                return messages[lang]['serious_response'].format(symptom=best_sym, specialty=med_info['response'])
-            else:
-                return messages[lang]['medication_response'].format(symptom=best_sym, meds=', '.join(med_info['response']))
-        
-        # Si aucune correspondance pertinente, répondre "Je n'ai pas compris"
-        return messages[lang]['not_understood']
\ No newline at end of file
+        return self.process_queries([query])[0]
@@ -1,5 +1,10 @@
-import pandas as pd
+import hashlib
 import os
+import pickle
+
+# numpy et pandas ne servent qu'à compiler la base de connaissances : ils
+# sont importés dans les fonctions, le chargement du pickle n'en a pas besoin.
+
 
 def load_dataset(file_path):
     """
@@ -11,7 +16,8 @@ def load_dataset(file_path):
     """
     if not os.path.exists(file_path):
         raise FileNotFoundError(f"Le fichier {file_path} n'existe pas.")
-    
+    import pandas as pd
+
     df = pd.read_csv(file_path)
 
     # Colonnes à convertir en minuscules (si elles existent dans le fichier)
@@ -25,6 +31,30 @@ def load_dataset(file_path):
     
     return df
 
+
+LANGUAGES = ('EN', 'FR', 'AR')
+
+# Incrémenter si le format de la base de connaissances change
+KNOWLEDGE_BASE_VERSION = 1
+
+
+def _clean_column(df, col):
+    """Colonne en chaînes minuscules sans espaces ('' si la colonne est absente)."""
+    import pandas as pd
+
+    if col not in df.columns:
+        return pd.Series('', index=df.index, dtype=object)
+    return df[col].map(str).str.strip().str.lower().astype(object)
+
+
+def _ordered_unique_lists(keys, values):
+    """{clé: valeurs uniques dans l'ordre d'apparition}, clés dans l'ordre d'apparition."""
+    import pandas as pd
+
+    pairs = pd.DataFrame({'key': keys, 'value': values}).drop_duplicates()
+    return {key: list(group) for key, group in pairs.groupby('key', sort=False)['value']}
+
+
 def preprocess_data(df):
     """
     Prétraitement des données pour le chatbot multilingue.
@@ -35,56 +65,103 @@ def preprocess_data(df):
         dict: Symptômes graves vers spécialités.
         dict: Maladies vers informations de gravité.
     """
+    import numpy as np
+    import pandas as pd
+
+    medication = _clean_column(df, 'Recommended_Medication')
+    is_serious = df['Serious'].map(bool) if 'Serious' in df.columns else pd.Series(False, index=df.index)
+    specialty = np.where(is_serious, _clean_column(df, 'Doctor_Specialty'), None)
+
+    # Une ligne par (ligne du CSV, langue), dans l'ordre ligne puis EN/FR/AR
+    long = pd.concat([
+        pd.DataFrame({
+            'row': np.arange(len(df)),
+            'lang': i,
+            'symptom': _clean_column(df, f'Symptom_{lang}').to_numpy(),
+            'illness': _clean_column(df, f'Illness_{lang}').to_numpy(),
+            'medication': medication.to_numpy(),
+            'serious': is_serious.to_numpy(dtype=bool),
+            'specialty': specialty,
+        })
+        for i, lang in enumerate(LANGUAGES)
+    ], ignore_index=True).sort_values(['row', 'lang'], kind='stable', ignore_index=True)
+    long['order'] = np.arange(len(long))
+
+    # --- Symptômes ---
+    sym = long[long['symptom'] != '']
+    symptoms_list = sym['symptom'].drop_duplicates().tolist()
+
+    # Une occurrence grave remplace la réponse par la spécialité ; les
+    # occurrences non graves suivantes repartent d'une liste de médicaments vide.
+    serious_sym = sym[sym['serious']]
+    last_serious = serious_sym.groupby('symptom', sort=False).tail(1).set_index('symptom')
+    after = sym['order'].to_numpy() > sym['symptom'].map(last_serious['order']).fillna(-1).to_numpy()
+    trailing = sym[~sym['serious'].to_numpy() & after]
+    trailing_meds = trailing[trailing['medication'] != '']
+    meds_by_symptom = _ordered_unique_lists(trailing_meds['symptom'], trailing_meds['medication'])
+    has_trailing = set(trailing['symptom'])
+    doctor_by_symptom = last_serious['specialty'].to_dict()
+
     symptom_to_response = {}
+    for symptom in symptoms_list:
+        if symptom in has_trailing:
+            symptom_to_response[symptom] = {'type': 'medication', 'response': meds_by_symptom.get(symptom, [])}
+        else:
+            symptom_to_response[symptom] = {'type': 'doctor', 'response': doctor_by_symptom[symptom]}
+
+    serious_first = serious_sym['symptom'].drop_duplicates()
+    serious_symptom_to_doctor = {symptom: doctor_by_symptom[symptom] for symptom in serious_first}
+
+    # --- Maladies ---
+    ill = long[long['illness'] != '']
+    ill_meds = ill[ill['medication'] != '']
+    meds_by_illness = _ordered_unique_lists(ill_meds['illness'], ill_meds['medication'])
+    last_serious_ill = ill[ill['serious']].groupby('illness', sort=False).tail(1).set_index('illness')['specialty']
+
     illness_to_med = {}
-    symptoms_list = []
-    serious_symptom_to_doctor = {}
     illness_to_serious_info = {}
-    
-    for _, row in df.iterrows():
-        symptom_en = str(row.get('Symptom_EN', '')).strip().lower()
-        symptom_fr = str(row.get('Symptom_FR', '')).strip().lower()
-        symptom_ar = str(row.get('Symptom_AR', '')).strip().lower()
-        illness_en = str(row.get('Illness_EN', '')).strip().lower()
-        illness_fr = str(row.get('Illness_FR', '')).strip().lower()
-        illness_ar = str(row.get('Illness_AR', '')).strip().lower()
-        medication = str(row.get('Recommended_Medication', '')).strip().lower()
-        is_serious = bool(row.get('Serious', False))
-        doctor_specialty = str(row.get('Doctor_Specialty', '')).strip().lower() if is_serious else None
-
-        for symptom in [symptom_en, symptom_fr, symptom_ar]:
-            if symptom and symptom not in symptoms_list:
-                symptoms_list.append(symptom)
-
-        for symptom in [symptom_en, symptom_fr, symptom_ar]:
-            if not symptom:
-                continue
-            if is_serious:
-                symptom_to_response[symptom] = {'type': 'doctor', 'response': doctor_specialty}
-                serious_symptom_to_doctor[symptom] = doctor_specialty
-            else:
-                if symptom not in symptom_to_response or symptom_to_response[symptom]['type'] != 'medication':
-                    symptom_to_response[symptom] = {'type': 'medication', 'response': []}
-                # Sécurité si ce n’est pas une liste
-                if not isinstance(symptom_to_response[symptom]['response'], list):
-                    symptom_to_response[symptom]['response'] = []
-                if medication and medication not in symptom_to_response[symptom]['response']:
-                    symptom_to_response[symptom]['response'].append(medication)
-
-        for illness in [illness_en, illness_fr, illness_ar]:
-            if not illness:
-                continue
-            if illness not in illness_to_med:
-                illness_to_med[illness] = []
-            if medication and medication not in illness_to_med[illness]:
-                illness_to_med[illness].append(medication)
-
-        for illness in [illness_en, illness_fr, illness_ar]:
-            if not illness:
-                continue
-            if is_serious:
-                illness_to_serious_info[illness] = {'serious': True, 'specialty': doctor_specialty}
-            elif illness not in illness_to_serious_info:
-                illness_to_serious_info[illness] = {'serious': False, 'specialty': None}
-    
+    for illness in ill['illness'].drop_duplicates():
+        illness_to_med[illness] = meds_by_illness.get(illness, [])
+        if illness in last_serious_ill.index:
+            illness_to_serious_info[illness] = {'serious': True, 'specialty': last_serious_ill[illness]}
+        else:
+            illness_to_serious_info[illness] = {'serious': False, 'specialty': None}
+
     return symptom_to_response, illness_to_med, symptoms_list, serious_symptom_to_doctor, illness_to_serious_info
+
+
+def load_knowledge_base(file_path, cache_dir=None):
+    """
+    Charge et prétraite le dataset, en réutilisant la base de connaissances
+    compilée (pickle) tant que le hash du CSV ne change pas.
+    Args:
+        file_path (str): Chemin vers le fichier CSV.
+        cache_dir (str): Dossier du cache (par défaut ChatBotMl/cache).
+    Returns:
+        tuple: Les cinq structures renvoyées par preprocess_data.
+    """
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(f"Le fichier {file_path} n'existe pas.")
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'cache')
+
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b''):
+            digest.update(chunk)
+    cache_path = os.path.join(cache_dir, f'knowledge-v{KNOWLEDGE_BASE_VERSION}-{digest.hexdigest()[:16]}.pkl')
+
+    if os.path.isfile(cache_path):
+        try:
+            with open(cache_path, 'rb') as fh:
+                return pickle.load(fh)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            pass
+
+    knowledge_base = preprocess_data(load_dataset(file_path))
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = f'{cache_path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as fh:
+        pickle.dump(knowledge_base, fh, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, cache_path)
+    return knowledge_base
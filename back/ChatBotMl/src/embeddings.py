@@ -0,0 +1,129 @@
+"""
+Backends d'embeddings du chatbot (encodage des symptômes et des requêtes).
+
+    torch       SentenceTransformer PyTorch fp32 (comportement d'origine)
+    torch-int8  le même modèle, couches Linear quantifiées dynamiquement en int8
+    onnx        export ONNX exécuté par ONNX Runtime
+    onnx-int8   export ONNX quantifié dynamiquement en int8
+
+Configuration (arguments ou variables d'environnement) :
+
+    CHATBOT_EMBEDDING_BACKEND   un des backends ci-dessus (torch par défaut)
+    CHATBOT_MODEL_DIR           dossier local du modèle : chargement sans réseau
+    CHATBOT_EMBEDDING_THREADS   threads d'inférence (torch / ONNX Runtime)
+
+Les backends ONNX nécessitent sentence-transformers >= 3.2 et
+``optimum[onnxruntime]`` ; leurs exports sont conservés dans le dossier de
+cache du chatbot.
+"""
+import os
+import platform
+import re
+
+BACKENDS = ('torch', 'torch-int8', 'onnx', 'onnx-int8')
+DEFAULT_BACKEND = os.getenv('CHATBOT_EMBEDDING_BACKEND', 'torch')
+DEFAULT_MODEL_DIR = os.getenv('CHATBOT_MODEL_DIR') or None
+DEFAULT_THREADS = int(os.getenv('CHATBOT_EMBEDDING_THREADS', '0')) or None
+
+ONNX_FILE = 'onnx/model.onnx'
+ONNX_INT8_FILE = 'onnx/model_qint8.onnx'
+
+
+class EmbeddingModel:
+    """
+    Modèle d'embeddings chargé par ``load_embedding_model`` ; ``encode`` a
+    la signature de ``SentenceTransformer.encode``.  ``cache_key`` distingue
+    les embeddings de symptômes mis en cache par chaque backend.
+    """
+
+    def __init__(self, model, backend, model_name, threads=None):
+        self.model = model
+        self.backend = backend
+        self.model_name = model_name
+        self.threads = threads
+
+    @property
+    def cache_key(self):
+        # torch garde la clé d'origine : les caches existants restent valides
+        return self.model_name if self.backend == 'torch' else f'{self.model_name}-{self.backend}'
+
+    def encode(self, sentences, **kwargs):
+        return self.model.encode(sentences, **kwargs)
+
+
+def load_embedding_model(model_name, backend=None, model_dir=None, threads=None, cache_dir=None):
+    """
+    Charge le modèle d'embeddings avec le backend demandé.
+    Args:
+        model_name (str): Nom du modèle SentenceTransformer.
+        backend (str): Un des BACKENDS (CHATBOT_EMBEDDING_BACKEND par défaut).
+        model_dir (str): Dossier local du modèle ; aucun accès réseau s'il est donné.
+        threads (int): Threads d'inférence (par défaut, ceux de la bibliothèque).
+        cache_dir (str): Dossier où conserver les exports ONNX.
+    Returns:
+        EmbeddingModel: Le modèle prêt à encoder.
+    """
+    backend = backend or DEFAULT_BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend d'embeddings inconnu : {backend} (attendu : {', '.join(BACKENDS)})")
+    model_dir = model_dir or DEFAULT_MODEL_DIR
+    threads = threads or DEFAULT_THREADS
+    if model_dir is not None and not os.path.isdir(model_dir):
+        raise FileNotFoundError(f"Dossier du modèle introuvable : {model_dir}")
+    source = model_dir or model_name
+
+    if backend.startswith('torch'):
+        model = _load_torch(source, backend == 'torch-int8', threads)
+    else:
+        model = _load_onnx(source, model_name, backend == 'onnx-int8', threads, cache_dir)
+    return EmbeddingModel(model, backend, model_name, threads)
+
+
+def _load_torch(source, quantize, threads):
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    if threads:
+        torch.set_num_threads(threads)
+    # fp32 : périphérique par défaut, comme avant ; int8 : CPU uniquement
+    model = SentenceTransformer(source, device='cpu' if quantize else None)
+    if quantize:
+        # Poids int8, activations quantifiées à la volée (CPU uniquement)
+        model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    model.eval()
+    return model
+
+
+def _load_onnx(source, model_name, quantize, threads, cache_dir):
+    try:
+        import onnxruntime
+        from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
+    except ImportError as exc:
+        raise ImportError(
+            "Les backends ONNX nécessitent sentence-transformers>=3.2 et optimum[onnxruntime]"
+        ) from exc
+
+    model_kwargs = {'provider': 'CPUExecutionProvider'}
+    if threads:
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        model_kwargs['session_options'] = options
+
+    # Export ONNX (et sa version int8) une fois, réutilisé ensuite hors ligne
+    slug = re.sub(r'[^A-Za-z0-9_.-]+', '_', model_name)
+    export_dir = os.path.join(cache_dir or '.', 'models', f'{slug}-onnx')
+    if not os.path.isfile(os.path.join(export_dir, ONNX_FILE)):
+        model = SentenceTransformer(source, device='cpu', backend='onnx', model_kwargs=model_kwargs)
+        model.save(export_dir)
+    if not quantize:
+        return SentenceTransformer(export_dir, device='cpu', backend='onnx',
+                                   model_kwargs=dict(model_kwargs, file_name=ONNX_FILE))
+
+    if not os.path.isfile(os.path.join(export_dir, ONNX_INT8_FILE)):
+        model = SentenceTransformer(export_dir, device='cpu', backend='onnx',
+                                    model_kwargs=dict(model_kwargs, file_name=ONNX_FILE))
+        config = 'arm64' if platform.machine().lower() in ('arm64', 'aarch64') else 'avx2'
+        export_dynamic_quantized_onnx_model(model, config, export_dir, file_suffix='qint8')
+    return SentenceTransformer(export_dir, device='cpu', backend='onnx',
+                               model_kwargs=dict(model_kwargs, file_name=ONNX_INT8_FILE))
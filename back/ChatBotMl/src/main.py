@@ -23,12 +23,26 @@ PROJECT_ROOT = CURRENT_DIR.parent.absolute()  # Goes up to ChatBotMI/
 sys.path.append(str(CURRENT_DIR))
 
 # Import from local files (no 'src.' prefix)
-from data_processing import load_dataset, preprocess_data
-from chatbot_model import MedicalChatbot
+from data_processing import load_knowledge_base
+from chatbot_model import TOP_K_SYMPTOMS, MedicalChatbot
+from serving import MicroBatcher, ResponseCache
 
 # Dataset path - adjust if your structure differs
 DATASET_PATH = PROJECT_ROOT / "data" / "final_chatbot_medical_dataset_multilingual.csv"
 
+# Response cache and micro-batching (see serving.py)
+CACHE_SIZE = int(os.getenv("CHATBOT_CACHE_SIZE", "10000"))
+CACHE_TTL = float(os.getenv("CHATBOT_CACHE_TTL", "3600"))
+BATCH_WAIT_MS = float(os.getenv("CHATBOT_BATCH_WAIT_MS", "5"))
+MAX_BATCH = int(os.getenv("CHATBOT_MAX_BATCH", "32"))
+# Embedding model: loaded in the background, lexical answers never wait for it
+MODEL_PRELOAD = os.getenv("CHATBOT_MODEL_PRELOAD", "background")
+# Every symptom of a sentence instead of the first match (see extract_symptoms)
+MULTI_SYMPTOM = os.getenv("CHATBOT_MULTI_SYMPTOM", "0") == "1"
+
+# Special commands, answered from the knowledge base alone
+SYMPTOM_COMMANDS = {'symptoms': 'en', 'symptômes': 'fr', 'الأعراض': 'ar'}
+
 # =============================================
 # DEBUGGING OUTPUT - VERIFY THESE PATHS
 # =============================================
@@ -44,16 +58,27 @@ if not DATASET_PATH.exists():
 # CHATBOT SERVICE CLASS
 # =============================================
 class ChatbotService:
-    def __init__(self):
+    def __init__(self, cache_size=CACHE_SIZE, cache_ttl=CACHE_TTL,
+                 batch_wait_ms=BATCH_WAIT_MS, max_batch=MAX_BATCH, preload=MODEL_PRELOAD,
+                 multi_symptom=MULTI_SYMPTOM):
         self.chatbot = None
+        self.preload = preload
+        self.multi_symptom = multi_symptom
+        # Responses keyed on (language, normalized query)
+        self.cache = ResponseCache(cache_size, cache_ttl)
+        self.batch_wait_ms = batch_wait_ms
+        self.max_batch = max_batch
+        self.batcher = None
         self.initialize_chatbot()
 
     def initialize_chatbot(self):
         """Initialize the chatbot with dataset"""
         try:
-            df = load_dataset(str(DATASET_PATH))
-            processed_data = preprocess_data(df)
-            self.chatbot = MedicalChatbot(*processed_data)
+            processed_data = load_knowledge_base(str(DATASET_PATH))
+            self.chatbot = MedicalChatbot(*processed_data, preload=self.preload)
+            # Concurrent cache misses share one model.encode batch
+            respond = self.chatbot.respond_multi if self.multi_symptom else self.chatbot.respond
+            self.batcher = MicroBatcher(respond, self.max_batch, self.batch_wait_ms)
             return True
         except Exception as e:
             print(f" Failed to initialize chatbot: {str(e)}", file=sys.stderr)
@@ -66,20 +91,68 @@ class ChatbotService:
         
         try:
             # Special commands
-            if query.lower() in ['symptoms', 'symptômes', 'الأعراض']:
-                return self.chatbot.process_query("symptoms")
-            
-            return self.chatbot.process_query(query)
+            command_lang = SYMPTOM_COMMANDS.get(query.strip().lower())
+            if command_lang:
+                return self.chatbot.list_symptoms(command_lang)
+
+            key = self.chatbot.normalize(query)
+            response = self.cache.get(key)
+            if response is None:
+                response = self.batcher.submit(key, key).result()
+                # Model unavailable: the answer may be a fallback, do not keep it
+                if not self.degraded:
+                    self.cache.put(key, response)
+            return response
         except Exception as e:
             print(f"Error processing query: {e}", file=sys.stderr)
             return "An error occurred while processing your request."
 
+    def analyze_query(self, query, k=TOP_K_SYMPTOMS):
+        """Symptoms found in the query, with scores, aggregated medications/specialties and the response"""
+        k = int(k)
+        if k < 1:
+            raise ValueError(f"k must be >= 1, got {k}")
+        if not self.chatbot:
+            return {"response": "Chatbot initialization failed. Please check logs."}
+
+        try:
+            # Special commands
+            command_lang = SYMPTOM_COMMANDS.get(query.strip().lower())
+            if command_lang:
+                return {"lang": command_lang, "symptoms": [], "illness": None, "medications": [],
+                        "specialties": [], "response": self.chatbot.list_symptoms(command_lang)}
+
+            key = ("analysis", k) + self.chatbot.normalize(query)
+            result = self.cache.get(key)
+            if result is None:
+                result = self.chatbot.extract_symptoms([key[2:]], k)[0]
+                # Model unavailable: lexical matches only, do not keep it
+                if not self.degraded:
+                    self.cache.put(key, result)
+            return dict(result, degraded=True) if self.degraded else result
+        except Exception as e:
+            print(f"Error analyzing query: {e}", file=sys.stderr)
+            return {"response": "An error occurred while processing your request."}
+
+    @property
+    def degraded(self):
+        """True while the embedding model failed to load (lexical answers only)"""
+        return bool(self.chatbot and self.chatbot.semantic_error is not None)
+
+    def metrics(self):
+        """Cache hit rate, micro-batching queue metrics and embedding model state"""
+        return {
+            "cache": self.cache.stats(),
+            "batcher": self.batcher.stats() if self.batcher else None,
+            "semantic": self.chatbot.semantic_status() if self.chatbot else None,
+        }
+
 # =============================================
 # CLI MODE
 # =============================================
 def run_cli():
     """Run the chatbot in CLI mode"""
-    service = ChatbotService()
+    service = ChatbotService(batch_wait_ms=0)
     if not service.chatbot:
         return
 
@@ -114,10 +187,14 @@ if __name__ == "__main__":
         pass  # start method already set
 
     if len(sys.argv) > 1:
-        # API Mode - Called from Node.js
-        service = ChatbotService()
+        # API Mode - Called from Node.js: one query, the model is loaded only if it needs it
+        args = sys.argv[1:]
+        multi_symptom = args[0] == "--multi"
+        if multi_symptom:
+            args = args[1:]
+        service = ChatbotService(batch_wait_ms=0, preload="lazy", multi_symptom=multi_symptom or MULTI_SYMPTOM)
         if service.chatbot:
-            query = ' '.join(sys.argv[1:])
+            query = ' '.join(args)
             response = service.process_query(query)
             print(response)
         else:
@@ -0,0 +1,118 @@
+from collections import deque
+
+import numpy as np
+from rapidfuzz import fuzz, process
+
+
+class IllnessMatcher:
+    """
+    Détection des maladies contenues dans une requête avec un automate
+    Aho–Corasick construit une seule fois.
+
+    Renvoie la même maladie que le parcours linéaire
+    ``for illness in illnesses: if illness in text`` : parmi toutes les
+    maladies présentes dans le texte, celle qui vient en premier dans
+    l'ordre d'origine.  Le coût dépend de la longueur du texte, pas de la
+    taille du vocabulaire.
+    """
+
+    def __init__(self, illnesses):
+        self.illnesses = [ill for ill in illnesses if ill]
+        self._goto = [{}]
+        self._fail = [0]
+        # plus petit rang de maladie se terminant dans chaque état (-1 : aucune)
+        self._best = [-1]
+
+        for rank, illness in enumerate(self.illnesses):
+            state = 0
+            for char in illness:
+                nxt = self._goto[state].get(char)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][char] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._best.append(-1)
+                state = nxt
+            if self._best[state] == -1:
+                self._best[state] = rank
+
+        # liens d'échec en largeur ; chaque état hérite du meilleur rang de son suffixe
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                inherited = self._best[self._fail[nxt]]
+                if inherited != -1 and (self._best[nxt] == -1 or inherited < self._best[nxt]):
+                    self._best[nxt] = inherited
+
+    def find(self, text):
+        """
+        Args:
+            text (str): Requête nettoyée.
+        Returns:
+            str or None: Maladie trouvée ou None.
+        """
+        goto, fail, best = self._goto, self._fail, self._best
+        state, found = 0, -1
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            rank = best[state]
+            if rank != -1 and (found == -1 or rank < found):
+                found = rank
+                if found == 0:
+                    break
+        return self.illnesses[found] if found != -1 else None
+
+
+class FuzzyMatcher:
+    """
+    Recherche floue sur une liste fixe de candidats avec ``rapidfuzz.process.cdist``
+    (une seule passe en C au lieu d'un appel ``fuzz.ratio`` par candidat).
+
+    Renvoie le premier candidat dont le score dépasse strictement le seuil,
+    comme la boucle d'origine.
+    """
+
+    def __init__(self, candidates):
+        self.candidates = list(candidates)
+
+    def match(self, query, threshold=90):
+        """
+        Args:
+            query (str): Requête de l'utilisateur.
+            threshold (int): Seuil de similarité (exclusif).
+        Returns:
+            str or None: Candidat correspondant ou None.
+        """
+        if not self.candidates:
+            return None
+        scores = process.cdist([query], self.candidates, scorer=fuzz.ratio,
+                               score_cutoff=threshold, dtype=np.float32)[0]
+        hits = np.flatnonzero(scores > threshold)
+        return self.candidates[hits[0]] if len(hits) else None
+
+    def best_matches(self, queries, threshold=90):
+        """
+        Meilleur candidat de chaque requête, en un seul appel ``cdist``.
+        Args:
+            queries (list): Requêtes (par exemple les n-grammes d'une phrase).
+            threshold (int): Seuil de similarité (exclusif).
+        Returns:
+            tuple: (indices, scores) ; indice -1 si aucun candidat ne dépasse le seuil.
+        """
+        if not self.candidates or not queries:
+            return np.full(len(queries), -1), np.zeros(len(queries), dtype=np.float32)
+        scores = process.cdist(queries, self.candidates, scorer=fuzz.ratio,
+                               score_cutoff=threshold, dtype=np.float32)
+        best = scores.argmax(axis=1)
+        best_scores = scores[np.arange(len(queries)), best]
+        return np.where(best_scores > threshold, best, -1), best_scores
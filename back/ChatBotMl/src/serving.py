@@ -0,0 +1,196 @@
+"""
+Cache des réponses et micro-batching des requêtes du chatbot.
+
+- ResponseCache : cache LRU borné avec durée de vie (TTL), indexé par la
+  requête normalisée et sa langue.
+- MicroBatcher : regroupe pendant quelques millisecondes les requêtes
+  concurrentes absentes du cache et les traite en un seul appel (un seul
+  ``model.encode``).
+
+Les deux exposent des métriques (taux de succès du cache, taille des lots,
+attente en file) pour régler les paramètres sous charge.
+"""
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class ResponseCache:
+    """
+    Cache LRU thread-safe : au plus ``max_size`` entrées, chacune valable
+    ``ttl`` secondes (None : sans expiration).
+    """
+
+    def __init__(self, max_size=10000, ttl=3600.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def get(self, key):
+        """
+        Args:
+            key (hashable): Clé, par exemple (langue, requête nettoyée).
+        Returns:
+            La valeur en cache, ou None si absente ou expirée.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at is None or expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+                self.expirations += 1
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        if self.max_size <= 0:
+            return
+        expires_at = None if self.ttl is None else time.monotonic() + self.ttl
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_s": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+class MicroBatcher:
+    """
+    File de requêtes traitée par un thread : dès qu'une requête arrive, on
+    attend au plus ``max_wait_ms`` (ou ``max_batch`` requêtes) puis
+    ``process_batch(items)`` est appelé une seule fois pour tout le lot.
+    Les requêtes identiques (même clé) d'un même lot ne sont traitées
+    qu'une fois.  Avec ``max_wait_ms=0``, chaque requête est traitée
+    directement dans le thread appelant.
+    """
+
+    def __init__(self, process_batch, max_batch=32, max_wait_ms=5.0, max_samples=1000):
+        self.process_batch = process_batch
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._waits = deque(maxlen=max_samples)
+        self._sizes = deque(maxlen=max_samples)
+        self.batches = self.items = self.coalesced = 0
+        self._thread = None
+        if self.max_wait > 0:
+            self._thread = threading.Thread(target=self._run, name="chatbot-batcher", daemon=True)
+            self._thread.start()
+
+    def submit(self, key, item):
+        """
+        Args:
+            key (hashable): Clé de déduplication de la requête.
+            item: Requête transmise à ``process_batch``.
+        Returns:
+            Future: Résultat de la requête.
+        """
+        future = Future()
+        if self._thread is None:
+            self._execute([(key, item, future, time.perf_counter())])
+            return future
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("MicroBatcher fermé")
+            self._queue.append((key, item, future, time.perf_counter()))
+            self._cond.notify()
+        return future
+
+    def close(self):
+        """Traite les requêtes en attente puis arrête le thread."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queue and not self._closed:
+                    self._cond.wait()
+                if not self._queue:
+                    return
+                deadline = self._queue[0][3] + self.max_wait
+                while len(self._queue) < self.max_batch and not self._closed:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = [self._queue.popleft() for _ in range(min(self.max_batch, len(self._queue)))]
+            self._execute(batch)
+
+    def _execute(self, batch):
+        start = time.perf_counter()
+        unique = {}
+        for key, item, _, _ in batch:
+            unique.setdefault(key, item)
+        keys = list(unique)
+        try:
+            results = dict(zip(keys, self.process_batch([unique[k] for k in keys])))
+        except Exception as exc:
+            for _, _, future, _ in batch:
+                future.set_exception(exc)
+            results = None
+
+        with self._cond:
+            self.batches += 1
+            self.items += len(batch)
+            self.coalesced += len(batch) - len(keys)
+            self._sizes.append(len(keys))
+            self._waits.extend((start - submitted) * 1000 for _, _, _, submitted in batch)
+        if results is not None:
+            for key, _, future, _ in batch:
+                future.set_result(results[key])
+
+    def stats(self):
+        with self._cond:
+            waits = np.asarray(self._waits, dtype=np.float64)
+            sizes = np.asarray(self._sizes, dtype=np.float64)
+            out = {
+                "max_batch": self.max_batch,
+                "max_wait_ms": self.max_wait * 1000,
+                "queued": len(self._queue),
+                "batches": self.batches,
+                "items": self.items,
+                "coalesced": self.coalesced,
+            }
+        if len(sizes):
+            out["mean_batch_size"] = round(float(sizes.mean()), 2)
+        if len(waits):
+            p50, p95 = np.percentile(waits, [50, 95])
+            out.update({
+                "queue_wait_p50_ms": round(float(p50), 3),
+                "queue_wait_p95_ms": round(float(p95), 3),
+                "queue_wait_max_ms": round(float(waits.max()), 3),
+            })
+        return out
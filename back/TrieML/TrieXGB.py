@@ -1,134 +1,416 @@
 import os
 import sys
 import json
+import argparse
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
 import pandas as pd
-from pymongo import MongoClient
-from sklearn.preprocessing import MultiLabelBinarizer, StandardScaler, LabelEncoder
+from sklearn.preprocessing import LabelEncoder
 from sklearn.metrics import accuracy_score
 from xgboost import XGBClassifier
 
-# --- 1. Entraînement sur le dataset CSV ---
 script_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(script_dir))
+from mlcommon import inference  # noqa: E402
+from mlcommon.artifacts import fingerprint, load_artifact, save_artifact  # noqa: E402
+from mlcommon.datasets import categorical, downcast, load_prepared, split_lists  # noqa: E402
+from mlcommon.features import TriageEncoder, parse_blood_pressure, records_to_columns  # noqa: E402
+from mlcommon.mongo import bulk_update, get_collection  # noqa: E402
+from mlcommon.streaming import iter_batches, projection, write_ndjson  # noqa: E402
+
 csv_path = os.path.join(script_dir, "patient_dataset_10000.csv")
-if not os.path.isfile(csv_path):
-    print(json.dumps({
-        "error": "Dataset file not found",
-        "path": csv_path
-    }), file=sys.stderr)
-    sys.exit(1)
-
-df_train = pd.read_csv(csv_path)
-bp = df_train["bloodPressure"].str.split("/", expand=True).astype(int)
-df_train["bp_sys"], df_train["bp_dia"] = bp[0], bp[1]
-df_train.drop("bloodPressure", axis=1, inplace=True)
-
-df_train["sym_list"] = df_train["symptoms"].str.split(",")
-mlb = MultiLabelBinarizer()
-sym_train = pd.DataFrame(
-    mlb.fit_transform(df_train["sym_list"]),
-    columns=[f"sym_{s.strip()}" for s in mlb.classes_],
-    index=df_train.index
-)
-df_train = pd.concat([df_train, sym_train], axis=1)
-df_train.drop(["symptoms", "sym_list"], axis=1, inplace=True)
-
-le = LabelEncoder()
-df_train["state_enc"] = le.fit_transform(df_train["state"])
-df_train.drop("state", axis=1, inplace=True)
-
-X_train = df_train.drop("state_enc", axis=1)
-y_train = df_train["state_enc"]
-
-num_cols = ["age", "glycemicIndex", "oxygenSaturation", "bp_sys", "bp_dia"]
-scaler = StandardScaler()
-X_train[num_cols] = scaler.fit_transform(X_train[num_cols])
-
-model = XGBClassifier(
-    n_estimators=200,
-    max_depth=3,
-    learning_rate=0.1,
-    eval_metric="mlogloss",
-    random_state=42
-)
-model.fit(X_train, y_train)
-
-# (Optional) log training accuracy
-y_train_pred = model.predict(X_train)
-train_acc = accuracy_score(y_train, y_train_pred)
-print(f"Training accuracy: {train_acc:.4f}", file=sys.stderr)
+model_path = os.path.join(script_dir, "artifacts", "triage_xgb.joblib")
+cache_path = os.path.join(script_dir, "artifacts", "triage_cache.joblib")
+
+# Bump when the content or layout of the saved artifact changes.
+ARTIFACT_VERSION = 2
+
+MODEL_PARAMS = {
+    "n_estimators": 200,
+    "max_depth": 3,
+    "learning_rate": 0.1,
+    "eval_metric": "mlogloss",
+    "random_state": 42,
+}
+
+
+def model_fingerprint():
+    """Hash of the training CSV, the hyperparameters and the artifact version."""
+    if not os.path.isfile(csv_path):
+        print(json.dumps({
+            "error": "Dataset file not found",
+            "path": csv_path
+        }), file=sys.stderr)
+        sys.exit(1)
+    return fingerprint([csv_path], MODEL_PARAMS, ARTIFACT_VERSION)
+
+
+# --- 1. Entraînement sur le dataset CSV ---
+def prepare_training_frame(df):
+    """Typed training columns: split blood pressure, symptom lists, categorical state."""
+    bp_sys, bp_dia, bp_valid = parse_blood_pressure(df["bloodPressure"])
+    return pd.DataFrame({
+        "age": downcast(df["age"]),
+        "glycemicIndex": downcast(df["glycemicIndex"]),
+        "oxygenSaturation": downcast(df["oxygenSaturation"]),
+        "bp_sys": bp_sys,
+        "bp_dia": bp_dia,
+        "bp_valid": bp_valid,
+        "symptoms": split_lists(df["symptoms"], ","),
+        "state": categorical(df["state"]),
+    })
+
+
+def load_training_frame():
+    """Training CSV from the columnar cache (compiled on first use)."""
+    return load_prepared(csv_path, prepare_training_frame)
+
+
+def train_model(fp):
+    df_train = load_training_frame()
+
+    # blood pressure, symptom one-hots and scaling in one float32 matrix
+    blood_pressure = tuple(df_train[c].to_numpy() for c in ("bp_sys", "bp_dia", "bp_valid"))
+    encoder, X_train, valid = TriageEncoder.fit(df_train, blood_pressure=blood_pressure)
+
+    le = LabelEncoder()
+    y_train = le.fit_transform(np.asarray(df_train["state"], dtype=object)[valid])
+
+    model = XGBClassifier(**MODEL_PARAMS)
+    model.fit(X_train, y_train)
+
+    # (Optional) log training accuracy
+    y_train_pred = model.predict(X_train)
+    train_acc = accuracy_score(y_train, y_train_pred)
+    print(f"Training accuracy: {train_acc:.4f}", file=sys.stderr)
+
+    return {
+        "version": ARTIFACT_VERSION,
+        "fingerprint": fp,
+        "model": model,
+        "encoder": encoder,
+        "label_encoder": le,
+        "feature_names": encoder.feature_names,
+        "train_accuracy": float(train_acc),
+    }
+
+
+def load_model(force_train=False):
+    """
+    Return the fitted model bundle, loading the saved artifact when it was
+    built from the current CSV and hyperparameters and retraining otherwise.
+    """
+    fp = model_fingerprint()
+    bundle = None if force_train else load_artifact(model_path, fp)
+    if bundle is None:
+        if not force_train:
+            print("Triage model artifact missing or stale, retraining", file=sys.stderr)
+        bundle = train_model(fp)
+        save_artifact(model_path, bundle)
+    return bundle
 
 
 # --- 2. Chargement depuis MongoDB ---
-MONGO_URI = os.getenv('MONGODB_URI')
-client = MongoClient(MONGO_URI)
-db = client["pidevDB"]
-collection = db["patientdatas"]
-
-docs = list(collection.find())
-if not docs:
-    print(json.dumps([], ensure_ascii=False))
-    sys.exit(0)
-
-df_clust = pd.DataFrame(docs)
-if "_id" in df_clust.columns:
-    df_clust["_id"] = df_clust["_id"].astype(str)
-    df_clust.rename(columns={"_id": "id"}, inplace=True)
-
-# a) Blood pressure — keep the original string!
-df_clust = df_clust[df_clust["bloodPressure"].notna()]
-bp2 = df_clust["bloodPressure"].astype(str).str.split("/", expand=True)
-df_clust["bp_sys"] = pd.to_numeric(bp2[0], errors="coerce")
-df_clust["bp_dia"] = pd.to_numeric(bp2[1], errors="coerce")
-df_clust.dropna(subset=["bp_sys", "bp_dia"], inplace=True)
-df_clust[["bp_sys", "bp_dia"]] = df_clust[["bp_sys", "bp_dia"]].astype(int)
-# **note**: we no longer drop "bloodPressure" so the original "##/##" string remains
-
-# b) Symptoms
-df_clust["symptoms"] = df_clust["symptoms"].fillna("").astype(str)
-df_clust["sym_list"] = df_clust["symptoms"].apply(lambda x: x.split(",") if x else [])
-sym_clust = pd.DataFrame(
-    mlb.transform(df_clust["sym_list"]),
-    columns=[f"sym_{s.strip()}" for s in mlb.classes_],
-    index=df_clust.index
-)
-df_clust = pd.concat([df_clust, sym_clust], axis=1)
-df_clust.drop(["symptoms", "sym_list"], axis=1, inplace=True)
-
-# c) Encode true state if it exists
-has_truth = "state" in df_clust.columns
-if has_truth:
-    df_clust["state_enc"] = le.transform(df_clust["state"])
-    df_clust.drop("state", axis=1, inplace=True)
-
-# d) Prepare features for prediction
-X_clust = df_clust.drop("state_enc", axis=1) if has_truth else df_clust.copy()
-existing = [c for c in num_cols if c in X_clust.columns]
-X_clust[existing] = scaler.transform(X_clust[existing])
-X_clust = X_clust.select_dtypes(include=["int64", "float64", "bool"])
-expected = model.get_booster().feature_names
-X_clust = X_clust[[c for c in X_clust.columns if c in expected]]
-
-# --- 3. Prédiction et export JSON final ---
-y_pred = model.predict(X_clust)
-if has_truth:
-    db_acc = accuracy_score(df_clust["state_enc"], y_pred)
-    print(f"DB-data accuracy: {db_acc:.4f}", file=sys.stderr)
-
-# copy model prediction into "state"
-df_clust["state"] = le.inverse_transform(y_pred)
-
-# clean up temporary columns
-df_clust.drop(columns=["state_enc", "predicted_state"], inplace=True, errors="ignore")
-
-# turn any remaining NaN into null
-df_clust = df_clust.replace({np.nan: None})
-
-df_clust.sort_values(by=["id"], inplace=True)
-print(
-    json.dumps(
-        df_clust.to_dict(orient="records"),
-        ensure_ascii=False,
-        default=str
+def patients_collection():
+    return get_collection("patientdatas")
+
+
+def load_patients():
+    return list(patients_collection().find())
+
+
+# --- 3. Prédiction ---
+def predict_patients(bundle, docs):
+    """Predict the triage state of raw ``patientdatas`` documents."""
+    if not docs:
+        return []
+    encoder = bundle["encoder"]
+    le = bundle["label_encoder"]
+
+    columns = records_to_columns(docs, encoder.INPUT_COLS)
+    bp_sys, bp_dia, valid = blood_pressure = parse_blood_pressure(columns["bloodPressure"])
+    X, _ = encoder.encode(columns, blood_pressure=blood_pressure)
+    if not len(X):
+        return []
+    kept = [d for d, ok in zip(docs, valid) if ok]
+    y_pred = inference.predict(bundle["model"], X)
+
+    # Accuracy against the stored state, when every document has a known one
+    truth = [d.get("state") for d in kept]
+    if all(s in le.classes_ for s in truth):
+        db_acc = accuracy_score(le.transform(truth), y_pred)
+        print(f"DB-data accuracy: {db_acc:.4f}", file=sys.stderr)
+
+    states = le.inverse_transform(y_pred)
+    sym_names = encoder.vocabulary.column_names
+    sym_flags = X[:, len(encoder.NUM_COLS):].astype(np.uint8).tolist()
+    bp_sys, bp_dia = bp_sys[valid].astype(int).tolist(), bp_dia[valid].astype(int).tolist()
+
+    records = []
+    for i, doc in enumerate(kept):
+        # keep the original "##/##" bloodPressure string, drop the raw symptoms
+        record = {("id" if k == "_id" else k): (str(v) if k == "_id" else v)
+                  for k, v in doc.items() if k != "symptoms"}
+        record["bp_sys"] = bp_sys[i]
+        record["bp_dia"] = bp_dia[i]
+        record.update(zip(sym_names, sym_flags[i]))
+        # copy model prediction into "state"
+        record["state"] = states[i]
+        records.append(record)
+
+    records.sort(key=lambda r: str(r.get("id", "")))
+    return records
+
+
+# --- 4. Mode incrémental ---
+class TriageCache:
+    """
+    Previous output records keyed by patient id, with the ``updatedAt``
+    watermark each one was computed from.  Tied to one model fingerprint.
+    """
+
+    def __init__(self, model_fp):
+        self.fingerprint = model_fp
+        self.records = {}
+        self.stamps = {}
+
+    @classmethod
+    def load(cls, model_fp):
+        payload = load_artifact(cache_path, model_fp)
+        cache = cls(model_fp)
+        if payload is not None:
+            cache.records = payload["records"]
+            cache.stamps = payload["stamps"]
+        return cache
+
+    def save(self):
+        save_artifact(cache_path, {
+            "fingerprint": self.fingerprint,
+            "records": self.records,
+            "stamps": self.stamps,
+        })
+
+
+def predict_incremental(bundle, collection, cache, full=False, chunk_size=5000):
+    """
+    Score only the patients that are new or whose ``updatedAt`` moved since
+    the cached prediction, and merge them with the cached records.  A model
+    change (different fingerprint) or ``full=True`` rescores everything.
+    Returns ``(records, cache, stats)``.
+    """
+    if full or cache.fingerprint != bundle["fingerprint"]:
+        cache = TriageCache(bundle["fingerprint"])
+
+    # ids + watermarks only; documents without updatedAt are always rescored
+    current = {}
+    stale = []
+    for doc in collection.find({}, {"_id": 1, "updatedAt": 1}):
+        sid = str(doc["_id"])
+        stamp = doc.get("updatedAt")
+        current[sid] = stamp
+        if stamp is None or cache.stamps.get(sid) != stamp:
+            stale.append(doc["_id"])
+
+    for start in range(0, len(stale), chunk_size):
+        docs = list(collection.find({"_id": {"$in": stale[start:start + chunk_size]}}))
+        for doc in docs:
+            sid = str(doc["_id"])
+            cache.records.pop(sid, None)
+            cache.stamps[sid] = doc.get("updatedAt")
+        for record in predict_patients(bundle, docs):
+            cache.records[record["id"]] = record
+
+    # forget deleted patients
+    for sid in set(cache.stamps) - set(current):
+        cache.stamps.pop(sid, None)
+        cache.records.pop(sid, None)
+
+    records = [cache.records[sid] for sid in sorted(current) if sid in cache.records]
+    stats = {"scored": len(stale), "reused": len(current) - len(stale)}
+    return records, cache, stats
+
+
+# --- 5. Mode streaming ---
+def predict_stream(bundle, collection, out, batch_size=2000, extra_fields=()):
+    """
+    Score the collection batch by batch through a cursor sorted by ``_id``
+    and write each batch as NDJSON as soon as it is scored.  Only the model
+    features (plus ``_id`` and ``extra_fields``) are read from MongoDB.
+    Returns the number of records written.
+    """
+    fields = list(bundle["encoder"].INPUT_COLS) + list(extra_fields)
+    cursor = collection.find({}, projection(fields)).sort("_id", 1).batch_size(batch_size)
+    written = 0
+    for docs in iter_batches(cursor, batch_size):
+        records = predict_patients(bundle, docs)
+        write_ndjson(records, out)
+        written += len(records)
+    return written
+
+
+# --- 6. Mode batch par shards ---
+_worker_bundle = None
+
+
+def shard_bounds(collection, n_shards):
+    """
+    ``_id`` boundaries splitting the collection into ``n_shards`` ranges of
+    roughly equal size, read from the ``_id`` index: ``[(lo, hi), ...]``
+    with ``lo`` inclusive, ``hi`` exclusive and None for an open end.
+    """
+    total = collection.count_documents({})
+    n_shards = max(1, min(n_shards, total))
+    cuts = []
+    for k in range(1, n_shards):
+        doc = next(iter(collection.find({}, {"_id": 1}).sort("_id", 1).skip(k * total // n_shards).limit(1)), None)
+        if doc is not None and (not cuts or doc["_id"] != cuts[-1]):
+            cuts.append(doc["_id"])
+    edges = [None] + cuts + [None]
+    return list(zip(edges[:-1], edges[1:]))
+
+
+def _init_worker(backend):
+    """Load the model artifact once per worker process."""
+    global _worker_bundle
+    inference.set_backend(backend)
+    _worker_bundle = load_model()
+
+
+def _score_shard(job):
+    """Score one ``_id`` range; returns its records (sorted by id) and the number of updated documents."""
+    lo, hi, batch_size, write_back, extra_fields = job
+    collection = patients_collection()
+    query = {}
+    if lo is not None:
+        query.setdefault("_id", {})["$gte"] = lo
+    if hi is not None:
+        query.setdefault("_id", {})["$lt"] = hi
+    fields = list(_worker_bundle["encoder"].INPUT_COLS) + list(extra_fields)
+    cursor = collection.find(query, projection(fields)).sort("_id", 1).batch_size(batch_size)
+
+    records, updated = [], 0
+    for docs in iter_batches(cursor, batch_size):
+        scored = predict_patients(_worker_bundle, docs)
+        if write_back:
+            ids = {str(d["_id"]): d["_id"] for d in docs}
+            updated += bulk_update(collection, [
+                ({"_id": ids[r["id"]]}, {"$set": {"state": r["state"]}}) for r in scored
+            ])
+        records.extend(scored)
+    return records, updated
+
+
+def predict_sharded(collection, out, workers=None, shards=None, batch_size=2000,
+                    write_back=False, extra_fields=()):
+    """
+    Score the collection in ``_id`` ranges, one process per worker, each
+    loading the model artifact once.  Shards come back in ``_id`` order and
+    are written as NDJSON (``out`` may be None), so no global sort is needed.
+    With ``write_back`` the predicted states are bulk-written to MongoDB.
+    Returns ``(written, updated)``.
+    """
+    workers = workers or os.cpu_count() or 1
+    bounds = shard_bounds(collection, shards or workers * 4)
+    jobs = [(lo, hi, batch_size, write_back, tuple(extra_fields)) for lo, hi in bounds]
+
+    if workers > 1:
+        # spawn : les workers ne partagent ni le client MongoDB ni les threads OpenMP
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("spawn"),
+                                   initializer=_init_worker, initargs=(inference.get_backend(),))
+        with pool:
+            results = pool.map(_score_shard, jobs)
+            return _merge_shards(results, out)
+    _init_worker(inference.get_backend())
+    return _merge_shards(map(_score_shard, jobs), out)
+
+
+def _merge_shards(results, out):
+    written = updated = 0
+    for records, n_updated in results:
+        if out is not None:
+            write_ndjson(records, out)
+        written += len(records)
+        updated += n_updated
+    return written, updated
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Triage classifier for patientdatas")
+    parser.add_argument(
+        "command", nargs="?", default="predict", choices=["predict", "train"],
+        help="'train' rebuilds the model artifact, 'predict' (default) scores MongoDB patients"
+    )
+    parser.add_argument("--incremental", action="store_true",
+                        help="only rescore patients that are new or changed since the last run")
+    parser.add_argument("--full", action="store_true",
+                        help="with --incremental: ignore the cache and rescore every patient")
+    parser.add_argument("--stream", action="store_true",
+                        help="read in batches with a projection and write NDJSON (one patient per line)")
+    parser.add_argument("--batch-size", type=int, default=2000,
+                        help="documents per batch in --stream and --workers modes")
+    parser.add_argument("--fields", default="",
+                        help="with --stream/--workers: comma-separated extra fields to read and output (e.g. status)")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="score the collection in _id shards with this many processes (NDJSON output)")
+    parser.add_argument("--shards", type=int, default=None,
+                        help="with --workers: number of _id ranges (default 4 per worker)")
+    parser.add_argument("--write-back", action="store_true",
+                        help="with --workers: bulk-write the predicted state to patientdatas")
+    parser.add_argument("--no-output", action="store_true",
+                        help="with --workers: do not print the records (e.g. with --write-back)")
+    parser.add_argument("--backend", choices=inference.BACKENDS, default=inference.get_backend(),
+                        help="prediction backend (see mlcommon/inference.py)")
+    args = parser.parse_args(argv)
+    inference.set_backend(args.backend)
+
+    if args.command == "train":
+        bundle = load_model(force_train=True)
+        print(json.dumps({
+            "artifact": model_path,
+            "fingerprint": bundle["fingerprint"],
+            "train_accuracy": bundle["train_accuracy"],
+        }))
+        return
+
+    bundle = load_model()
+    if args.stream:
+        extra = [f.strip() for f in args.fields.split(",") if f.strip()]
+        written = predict_stream(bundle, patients_collection(), sys.stdout, args.batch_size, extra)
+        print(f"Streamed {written} patients", file=sys.stderr)
+        return
+
+    if args.workers:
+        extra = [f.strip() for f in args.fields.split(",") if f.strip()]
+        written, updated = predict_sharded(
+            patients_collection(), None if args.no_output else sys.stdout, args.workers, args.shards,
+            args.batch_size, args.write_back, extra
+        )
+        print(f"Sharded triage: {written} scored, {updated} updated", file=sys.stderr)
+        return
+
+    if args.incremental:
+        cache = TriageCache.load(bundle["fingerprint"])
+        records, cache, stats = predict_incremental(bundle, patients_collection(), cache, full=args.full)
+        cache.save()
+        print(f"Incremental triage: {stats['scored']} scored, {stats['reused']} reused", file=sys.stderr)
+        print(json.dumps(records, ensure_ascii=False, default=str))
+        return
+
+    docs = load_patients()
+    if not docs:
+        print(json.dumps([], ensure_ascii=False))
+        return
+
+    # --- 6. Export JSON final ---
+    print(
+        json.dumps(
+            predict_patients(bundle, docs),
+            ensure_ascii=False,
+            default=str
+        )
     )
-)
+
+
+if __name__ == "__main__":
+    main()
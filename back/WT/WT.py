@@ -2,46 +2,87 @@
 import os
 import sys
 import json
+import argparse
 
 import pandas as pd
 import numpy as np
-from pymongo import MongoClient
 from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import mean_squared_error, r2_score
 from xgboost import XGBRegressor
 
-def main():
-    # 1) TRAIN on CSV
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    csv_path = os.path.join(script_dir, "patient_dataset_WT.csv")
+script_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(script_dir))
+from mlcommon import inference  # noqa: E402
+from mlcommon.artifacts import fingerprint, load_artifact, save_artifact  # noqa: E402
+from mlcommon.datasets import categorical, downcast, load_prepared  # noqa: E402
+from mlcommon.features import WaitTimeEncoder, encode_states, records_to_columns  # noqa: E402
+from mlcommon.mongo import get_collection  # noqa: E402
+from mlcommon.stages import StageTimer  # noqa: E402
+from mlcommon.streaming import iter_batches, projection, write_ndjson  # noqa: E402
+
+csv_path = os.path.join(script_dir, "patient_dataset_WT.csv")
+model_path = os.path.join(script_dir, "artifacts", "wt_xgb.joblib")
+
+# Bump when the content or layout of the saved artifact changes.
+ARTIFACT_VERSION = 2
+
+MODEL_PARAMS = {
+    "objective": "reg:squarederror",
+    "n_estimators": 100,
+    "max_depth": 9,
+    "learning_rate": 0.01,
+    "random_state": 42,
+}
+
+
+def model_fingerprint():
     if not os.path.isfile(csv_path):
         print(json.dumps({
             "error": "Dataset file not found",
             "path": csv_path
         }), file=sys.stderr)
         sys.exit(1)
+    return fingerprint([csv_path], MODEL_PARAMS, ARTIFACT_VERSION)
+
+
+def prepare_training_frame(df):
+    """
+    Typed training columns: numbers downcast (the target stays float64),
+    text as categoricals and ``state_enc`` precomputed.
+    """
+    out = pd.DataFrame({
+        c: df[c] if c == "waiting_time_minutes"
+        else downcast(df[c]) if pd.api.types.is_numeric_dtype(df[c])
+        else categorical(df[c])
+        for c in df.columns
+    })
+    out["state_enc"] = encode_states(df["state"]).astype(np.int8)
+    return out
+
+
+def load_training_frame():
+    """Training CSV from the columnar cache (compiled on first use)."""
+    return load_prepared(csv_path, prepare_training_frame)
 
-    df = pd.read_csv(csv_path)
 
-    # encode 'state' for features, but keep the string
-    if "state" in df.columns:
-        df["state_enc"] = df["state"].astype("category").cat.codes
+def train_model(fp):
+    """TRAIN on CSV and return the model bundle."""
+    df = load_training_frame()
 
     # split off target
     if "waiting_time_minutes" not in df.columns:
         print(json.dumps({"error": "waiting_time_minutes column missing"}), file=sys.stderr)
         sys.exit(1)
     y = df["waiting_time_minutes"]
-    X = df.drop(columns=["waiting_time_minutes"])
 
-    # drop non-numeric (we leave state_enc)
-    non_num = X.select_dtypes(include=["object"]).columns
-    X = X.drop(columns=non_num)
+    # numeric columns only, plus 'state' encoded with the fixed mapping
+    feature_columns = [
+        c for c in df.columns
+        if c not in ("waiting_time_minutes", "state_enc") and pd.api.types.is_numeric_dtype(df[c])
+    ] + ["state_enc"]
 
     # scale
-    scaler = StandardScaler()
-    X_scaled = scaler.fit_transform(X)
+    encoder, X_scaled = WaitTimeEncoder.fit(df, feature_columns, len(df))
 
     # train/val split
     X_tr, X_val, y_tr, y_val = train_test_split(
@@ -49,13 +90,7 @@ def main():
     )
 
     # fit regression model
-    model = XGBRegressor(
-        objective="reg:squarederror",
-        n_estimators=100,
-        max_depth=9,
-        learning_rate=0.01,
-        random_state=42
-    )
+    model = XGBRegressor(**MODEL_PARAMS)
     model.fit(X_tr, y_tr)
 
     # validate
@@ -63,50 +98,52 @@ def main():
     mse_val = mean_squared_error(y_val, y_val_pred)
     r2_val  = r2_score(y_val, y_val_pred)
 
-    # 2) LOAD test set from WT
-    MONGO_URI = os.getenv('MONGODB_URI')
-    client = MongoClient(MONGO_URI)
-    db = client["pidevDB"]
-    docs = list(db["WT"].find())
+    return {
+        "version": ARTIFACT_VERSION,
+        "fingerprint": fp,
+        "model": model,
+        "encoder": encoder,
+        "feature_columns": feature_columns,
+        "validation": {"mse": float(mse_val), "r2": float(r2_val)},
+    }
+
+
+def load_model(force_train=False):
+    """Load the saved regressor, retraining when the artifact is missing or stale."""
+    fp = model_fingerprint()
+    bundle = None if force_train else load_artifact(model_path, fp)
+    if bundle is None:
+        if not force_train:
+            print("Wait-time model artifact missing or stale, retraining", file=sys.stderr)
+        bundle = train_model(fp)
+        save_artifact(model_path, bundle)
+    return bundle
+
+
+def wt_collection():
+    return get_collection("WT")
 
-    if not docs:
-        output = {
-            "validation": {"mse": mse_val, "r2": r2_val},
-            "test": None,
-            "predictions": []
-        }
-        print(json.dumps(output, ensure_ascii=False, default=str))
-        return
 
-    # build DataFrame
-    df_test = pd.DataFrame(docs)
-    # stringify ObjectId
-    if "_id" in df_test.columns:
-        df_test["_id"] = df_test["_id"].astype(str)
+def load_wt_docs():
+    return list(wt_collection().find())
 
-    # 3) capture raw output BEFORE encoding
-    raw = df_test.to_dict(orient="records")
 
-    # 4) encode state for features, leaving raw['state'] intact
-    if "state" in df_test.columns:
-        df_test["state_enc"] = df_test["state"].astype("category").cat.codes
+def predict_docs(bundle, docs):
+    """Predict waiting times for WT documents; returns (test_metrics, predictions)."""
+    if not docs:
+        return None, []
 
-    # prepare test features: drop all object columns but keep state_enc
-    drop_cols = df_test.select_dtypes(include=["object"]).columns
-    X_test = df_test.drop(columns=drop_cols)
+    encoder = bundle["encoder"]
+    columns = records_to_columns(docs, encoder.feature_columns + ["state", "waiting_time_minutes"])
 
     # pull out target if present (unlikely in WT)
     y_test = None
-    if "waiting_time_minutes" in X_test.columns:
-        y_test = X_test["waiting_time_minutes"].values
-        X_test = X_test.drop(columns=["waiting_time_minutes"])
-
-    # align to training columns
-    X_test = X_test.reindex(columns=X.columns, fill_value=0)
+    if any(v is not None for v in columns["waiting_time_minutes"]):
+        y_test = np.asarray(columns["waiting_time_minutes"], dtype=np.float64)
 
-    # scale & predict
-    X_test_scaled = scaler.transform(X_test)
-    y_pred = model.predict(X_test_scaled)
+    # align to training columns, encode state & scale, then predict
+    X_test = encoder.encode(columns, len(docs))
+    y_pred = inference.predict(bundle["model"], X_test)
 
     # optional test metrics
     test_metrics = None
@@ -115,22 +152,111 @@ def main():
         r2_test  = r2_score(y_test, y_pred)
         test_metrics = {"mse": mse_test, "r2": r2_test}
 
-    # 5) build final predictions array
+    # build final predictions array
     predictions = []
-    for doc, pred in zip(raw, y_pred):
+    for doc, pred in zip(docs, y_pred):
         entry = dict(doc)
+        # stringify ObjectId
+        if "_id" in entry:
+            entry["_id"] = str(entry["_id"])
         entry["predicted_waiting_time"] = float(pred)
         # drop createdAt if present
         entry.pop("createdAt", None)
         predictions.append(entry)
 
-    # 6) output JSON
+    return test_metrics, predictions
+
+
+def predict_stream(bundle, collection, out, batch_size=2000, extra_fields=()):
+    """
+    Score the collection batch by batch (projection limited to the model
+    features, ``state`` and ``_id``) and write NDJSON as each batch is done.
+    Returns ``(written, test_metrics)``; the metrics are accumulated over the
+    batches when the documents carry ``waiting_time_minutes``.
+    """
+    fields = bundle["feature_columns"] + ["state", "waiting_time_minutes"] + list(extra_fields)
+    cursor = collection.find({}, projection(fields)).sort("_id", 1).batch_size(batch_size)
+    written, n, sse, sum_y, sum_y2 = 0, 0, 0.0, 0.0, 0.0
+    for docs in iter_batches(cursor, batch_size):
+        _, predictions = predict_docs(bundle, docs)
+        write_ndjson(predictions, out)
+        written += len(predictions)
+        for entry in predictions:
+            y = entry.get("waiting_time_minutes")
+            if y is None:
+                continue
+            n += 1
+            sse += (y - entry["predicted_waiting_time"]) ** 2
+            sum_y += y
+            sum_y2 += y * y
+
+    test_metrics = None
+    if n:
+        ss_tot = sum_y2 - sum_y * sum_y / n
+        test_metrics = {"mse": sse / n, "r2": 1 - sse / ss_tot if ss_tot else 0.0}
+    return written, test_metrics
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Waiting-time regressor for the WT collection")
+    parser.add_argument(
+        "command", nargs="?", default="predict", choices=["predict", "train"],
+        help="'train' rebuilds the model artifact, 'predict' (default) scores the WT collection"
+    )
+    parser.add_argument("--stream", action="store_true",
+                        help="read in batches with a projection and write NDJSON (one prediction per line)")
+    parser.add_argument("--batch-size", type=int, default=2000,
+                        help="documents per batch in --stream mode")
+    parser.add_argument("--fields", default="",
+                        help="with --stream: comma-separated extra fields to read and output")
+    parser.add_argument("--backend", choices=inference.BACKENDS, default=inference.get_backend(),
+                        help="prediction backend (see mlcommon/inference.py)")
+    parser.add_argument("--timings", action="store_true",
+                        help="print the stage timings (see mlcommon/stages.py) on stderr")
+    args = parser.parse_args(argv)
+    inference.set_backend(args.backend)
+    timer = StageTimer()
+
+    # The WT query does not depend on the model: run it while the model loads
+    docs_future = None
+    if args.command == "predict" and not args.stream:
+        docs_future = timer.submit("mongo_wt_docs", load_wt_docs)
+
+    # 1) TRAIN on CSV (or load the saved artifact)
+    with timer.stage("load_model"):
+        bundle = load_model(force_train=args.command == "train")
+    if args.command == "train":
+        print(json.dumps({
+            "artifact": model_path,
+            "fingerprint": bundle["fingerprint"],
+            "validation": bundle["validation"],
+        }))
+        return
+
+    # 2) LOAD test set from WT
+    if args.stream:
+        extra = [f.strip() for f in args.fields.split(",") if f.strip()]
+        with timer.stage("predict_stream"):
+            written, test_metrics = predict_stream(bundle, wt_collection(), sys.stdout, args.batch_size, extra)
+        print(json.dumps({"validation": bundle["validation"], "test": test_metrics,
+                          "streamed": written}), file=sys.stderr)
+        if args.timings:
+            print(json.dumps({"timings": timer.report()}), file=sys.stderr)
+        return
+
+    docs = timer.wait("wait_wt_docs", docs_future)
+    with timer.stage("predict"):
+        test_metrics, predictions = predict_docs(bundle, docs)
+
+    # 3) output JSON
     output = {
-        "validation": {"mse": mse_val, "r2": r2_val},
+        "validation": bundle["validation"],
         "test": test_metrics,
         "predictions": predictions
     }
     print(json.dumps(output, ensure_ascii=False, default=str))
+    if args.timings:
+        print(json.dumps({"timings": timer.report()}), file=sys.stderr)
 
 if __name__ == "__main__":
     main()
@@ -11,6 +11,11 @@ var app = express();
 const connectDB = require('./config/db');
 connectDB();
 
+// Start the resident Python ML server now so the first request does not wait
+// for the models to load.
+const { getMlService } = require('./services/mlService');
+getMlService().start();
+
 var PrescriptionRouter = require('./routes/PrescriptionRoutes');
 var pharmacyRouter = require('./routes/PharmacyRoutes');
 var indexRouter = require('./routes/index');
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Chatbot startup profile: time from a cold process to the first answer, per
+kind of query and per model preload mode (CHATBOT_MODEL_PRELOAD).
+
+Each measurement runs in a fresh interpreter:
+
+    import_s        importing ChatBotMl/src/main.py
+    init_s          ChatbotService.initialize_chatbot (knowledge base + preload)
+    first_answer_s  first process_query, once initialized
+    total_s         whole child process, interpreter start included
+    heavy_modules   which of torch / sentence_transformers / pandas got imported
+
+Queries: the "symptoms" command, an exact illness, a misspelt symptom (fuzzy
+matcher) and a paraphrase that needs the embedding model.  With ``--importtime``
+the slowest imports of the lazy lexical path are listed (``python -X importtime``).
+
+    python benchmarks/chatbot_startup.py --model-dir /models/paraphrase-multilingual-MiniLM-L12-v2
+    python benchmarks/chatbot_startup.py --modes lazy eager --repeat 5 --importtime
+
+Prints one JSON object per (mode, query) on stdout.  The semantic query caches
+the symptom embeddings in ChatBotMl/cache, like the service does.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+BACK_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC_DIR = os.path.join(BACK_DIR, "ChatBotMl", "src")
+sys.path.insert(0, SRC_DIR)
+from chatbot_model import PRELOAD_MODES  # noqa: E402
+
+QUERIES = {
+    "command": "symptoms",
+    "exact": "migraine",
+    "fuzzy": "I have feverr",
+    "semantic": "my chest feels tight and I cannot breathe",
+}
+HEAVY_MODULES = ("torch", "sentence_transformers", "transformers", "pandas")
+
+CHILD = r"""
+import json, sys, time
+start = time.perf_counter()
+sys.path.insert(0, {src!r})
+import main
+imported = time.perf_counter()
+service = main.ChatbotService(batch_wait_ms=0, preload={mode!r})
+service.initialize_chatbot()
+initialized = time.perf_counter()
+answer = service.process_query({query!r})
+answered = time.perf_counter()
+print(json.dumps({{
+    "import_s": imported - start,
+    "init_s": initialized - imported,
+    "first_answer_s": answered - initialized,
+    "heavy_modules": [m for m in {heavy!r} if m in sys.modules],
+    "answer": answer[:80],
+}}, ensure_ascii=False))
+"""
+
+
+def run_child(mode, query, env):
+    code = CHILD.format(src=SRC_DIR, mode=mode, query=query, heavy=HEAVY_MODULES)
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=env)
+    total = time.perf_counter() - start
+    if proc.returncode != 0:
+        lines = [l for l in proc.stderr.splitlines() if l and not l.startswith((" ", "Traceback"))]
+        raise RuntimeError(lines[-1] if lines else f"exit code {proc.returncode}")
+    out = json.loads(proc.stdout.strip().splitlines()[-1])
+    out["total_s"] = total
+    return out
+
+
+def import_profile(query, env, top):
+    """Slowest modules (cumulative µs) imported while answering ``query`` lazily."""
+    code = CHILD.format(src=SRC_DIR, mode="lazy", query=query, heavy=HEAVY_MODULES)
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                          capture_output=True, text=True, env=env)
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not name[1:].startswith(" "):  # top-level imports only
+            rows.append((int(cumulative), name.strip()))
+    return [{"module": name, "cumulative_ms": round(us / 1000, 1)}
+            for us, name in sorted(rows, reverse=True)[:top]]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--modes", nargs="+", choices=PRELOAD_MODES, default=["lazy", "background", "eager"])
+    parser.add_argument("--queries", nargs="+", choices=list(QUERIES), default=list(QUERIES))
+    parser.add_argument("--repeat", type=int, default=3, help="cold starts per (mode, query)")
+    parser.add_argument("--model-dir", default=None, help="local model directory (CHATBOT_MODEL_DIR)")
+    parser.add_argument("--importtime", action="store_true", help="also profile the lexical path imports")
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    env = dict(os.environ)
+    if args.model_dir:
+        env["CHATBOT_MODEL_DIR"] = args.model_dir
+
+    for mode in args.modes:
+        for kind in args.queries:
+            out = {"mode": mode, "query": kind}
+            try:
+                runs = [run_child(mode, QUERIES[kind], env) for _ in range(args.repeat)]
+            except Exception as exc:  # model unavailable here (no network, no --model-dir...)
+                out["error"] = f"{type(exc).__name__}: {exc}"
+                print(json.dumps(out, ensure_ascii=False), flush=True)
+                continue
+            for key in ("import_s", "init_s", "first_answer_s", "total_s"):
+                out[key] = round(float(np.median([r[key] for r in runs])), 3)
+            out["heavy_modules"] = runs[-1]["heavy_modules"]
+            out["answer"] = runs[-1]["answer"]
+            print(json.dumps(out, ensure_ascii=False), flush=True)
+
+    if args.importtime:
+        for kind in ("command", "exact", "fuzzy"):
+            if kind in args.queries:
+                print(json.dumps({"importtime": kind, "top": import_profile(QUERIES[kind], env, args.top)},
+                                 ensure_ascii=False), flush=True)
+
+
+if __name__ == "__main__":
+    main()
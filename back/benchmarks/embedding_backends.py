@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Compare the chatbot embedding backends (ChatBotMl/src/embeddings.py) on the
+multilingual symptom CSV: load time, parity with the fp32 ``torch`` backend
+and query latency.
+
+Queries are built from the CSV rows ("I have <symptom>", "j'ai <symptôme>",
+"عندي <عرض>").  For every backend:
+
+    cosine_min / cosine_mean   symptom embeddings vs the torch ones
+    top1_agreement             nearest symptom identical to torch's
+    decision_agreement         same side of SIMILARITY_THRESHOLD as torch
+    top1_accuracy              nearest symptom belongs to the query's CSV row
+    query_p50_ms / p95_ms      one query per encode call
+    batch_qps                  queries per second in batches of 64
+
+A backend passes when, against torch, decision_agreement >= 0.99 and
+top1_agreement >= 0.98 (MIN_DECISION_AGREEMENT / MIN_TOP1_AGREEMENT); the
+script exits with status 1 if one fails, or if the torch reference cannot
+be loaded.  Backends whose runtime is not installed are reported with an
+``error`` and skipped.
+
+    python benchmarks/embedding_backends.py --model-dir /models/paraphrase-multilingual-MiniLM-L12-v2
+    python benchmarks/embedding_backends.py --backends torch torch-int8 --threads 4
+
+Prints one JSON object per backend on stdout.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+CHATBOT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "ChatBotMl")
+sys.path.insert(0, os.path.join(CHATBOT_DIR, "src"))
+from chatbot_model import CACHE_DIR, MODEL_NAME, SIMILARITY_THRESHOLD, SymptomIndex  # noqa: E402
+from data_processing import LANGUAGES, load_knowledge_base  # noqa: E402
+from embeddings import BACKENDS, load_embedding_model  # noqa: E402
+
+CSV_PATH = os.path.join(CHATBOT_DIR, "data", "final_chatbot_medical_dataset_multilingual.csv")
+PREFIXES = {"EN": "I have ", "FR": "j'ai ", "AR": "عندي "}
+BATCH_SIZE = 64
+# Acceptance thresholds against the fp32 torch backend
+MIN_DECISION_AGREEMENT = 0.99
+MIN_TOP1_AGREEMENT = 0.98
+
+
+def build_queries(n, seed=0):
+    """``n`` (query, accepted symptoms) pairs drawn from the CSV rows."""
+    df = pd.read_csv(CSV_PATH)
+    rng = np.random.default_rng(seed)
+    queries = []
+    while len(queries) < n:
+        row = df.iloc[int(rng.integers(0, len(df)))]
+        accepted = {str(row[f"Symptom_{lang}"]).strip().lower()
+                    for lang in LANGUAGES if isinstance(row[f"Symptom_{lang}"], str)}
+        lang = LANGUAGES[int(rng.integers(0, len(LANGUAGES)))]
+        symptom = row[f"Symptom_{lang}"]
+        if isinstance(symptom, str):
+            queries.append((PREFIXES[lang] + symptom.strip().lower(), accepted))
+    return queries
+
+
+def encode(model, texts):
+    return np.asarray(
+        model.encode(texts, convert_to_numpy=True, normalize_embeddings=True), dtype=np.float32
+    )
+
+
+def evaluate(model, symptoms, queries, repeat):
+    symptom_emb = encode(model, symptoms)
+    texts = [q for q, _ in queries]
+    query_emb = encode(model, texts)
+    top, scores = SymptomIndex(symptom_emb).search(query_emb, k=1)
+
+    latencies = []
+    for text in texts[:repeat]:
+        start = time.perf_counter()
+        encode(model, [text])
+        latencies.append((time.perf_counter() - start) * 1000)
+    start = time.perf_counter()
+    for i in range(0, len(texts), BATCH_SIZE):
+        encode(model, texts[i:i + BATCH_SIZE])
+    batch_s = time.perf_counter() - start
+
+    p50, p95 = np.percentile(latencies, [50, 95])
+    return symptom_emb, top[:, 0], scores[:, 0] > SIMILARITY_THRESHOLD, {
+        "query_p50_ms": round(float(p50), 3),
+        "query_p95_ms": round(float(p95), 3),
+        "batch_qps": round(len(texts) / batch_s, 1),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=list(BACKENDS))
+    parser.add_argument("--model-name", default=MODEL_NAME)
+    parser.add_argument("--model-dir", default=None, help="local model directory (no network access)")
+    parser.add_argument("--threads", type=int, default=None, help="inference threads per backend")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=100, help="single-query encodes timed")
+    args = parser.parse_args(argv)
+
+    _, _, symptoms, _, _ = load_knowledge_base(CSV_PATH)
+    queries = build_queries(args.queries)
+    backends = ["torch"] + [b for b in args.backends if b != "torch"]
+    reference = None
+    failed = []
+
+    for backend in backends:
+        out = {"backend": backend, "threads": args.threads}
+        try:
+            start = time.perf_counter()
+            model = load_embedding_model(args.model_name, backend, args.model_dir, args.threads, CACHE_DIR)
+            out["load_s"] = round(time.perf_counter() - start, 3)
+            emb, top1, accepted, timings = evaluate(model, symptoms, queries, args.repeat)
+        except Exception as exc:  # backend unavailable here (missing runtime, no model...)
+            out["error"] = f"{type(exc).__name__}: {exc}"
+            print(json.dumps(out, ensure_ascii=False), flush=True)
+            if backend == "torch":
+                break  # nothing to compare against
+            continue
+
+        if reference is None:
+            reference = emb, top1, accepted
+        cosine = np.sum(emb * reference[0], axis=1)
+        out.update({
+            "cosine_min": round(float(cosine.min()), 5),
+            "cosine_mean": round(float(cosine.mean()), 5),
+            "top1_agreement": round(float((top1 == reference[1]).mean()), 4),
+            "decision_agreement": round(float((accepted == reference[2]).mean()), 4),
+            "top1_accuracy": round(float(np.mean([
+                symptoms[i] in ok for i, (_, ok) in zip(top1, queries)
+            ])), 4),
+            **timings,
+        })
+        out["passed"] = (out["decision_agreement"] >= MIN_DECISION_AGREEMENT
+                         and out["top1_agreement"] >= MIN_TOP1_AGREEMENT)
+        if not out["passed"]:
+            failed.append(backend)
+        print(json.dumps(out, ensure_ascii=False), flush=True)
+
+    if reference is None:
+        print("Embedding parity check failed: the torch reference backend could not be loaded",
+              file=sys.stderr)
+        sys.exit(1)
+    if failed:
+        print(f"Embedding parity check failed: {', '.join(failed)} (decision_agreement >= "
+              f"{MIN_DECISION_AGREEMENT}, top1_agreement >= {MIN_TOP1_AGREEMENT} vs torch)",
+              file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
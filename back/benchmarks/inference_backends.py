@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Compare the prediction backends of mlcommon/inference.py on the TrieXGB and
+WT models: agreement with the sklearn ``predict`` and latency per batch size.
+
+Batches are resampled (with replacement) from the encoded training CSVs, so
+the feature distribution is the real one at any size.
+
+Parity is a hard check: every backend must give exactly the triage classes
+of ``model.predict`` and WT waiting times within ``WT_TOLERANCE`` minutes.
+The script exits with status 1 when a backend misses it.  ``--check`` only
+runs the parity check, on a few small batches (auto threshold, compiled
+chunking), fast enough to run after every change to the inference code.
+
+    python benchmarks/inference_backends.py                  # 1 / 100 / 10k / 1M rows
+    python benchmarks/inference_backends.py --sizes 1 100 --repeat 50
+    python benchmarks/inference_backends.py --check
+
+Prints one JSON object per (model, backend, batch size) on stdout.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from mlcommon import inference  # noqa: E402
+from mlcommon.scripts import import_script  # noqa: E402
+
+TrieXGB = import_script("TrieXGB", "TrieML/TrieXGB.py")
+WT = import_script("WT", "WT/WT.py")
+
+# Largest |difference| accepted between a backend and model.predict (minutes)
+WT_TOLERANCE = 1e-4
+# --check: around AUTO_COMPILED_MAX_ROWS and past one COMPILED_CHUNK_ROWS chunk
+CHECK_SIZES = [1, inference.AUTO_COMPILED_MAX_ROWS, inference.AUTO_COMPILED_MAX_ROWS + 1,
+               inference.COMPILED_CHUNK_ROWS + 1]
+
+
+def triage_matrix(bundle):
+    df = TrieXGB.load_training_frame()
+    encoder = bundle["encoder"]
+    columns = {c: df[c].tolist() for c in encoder.INPUT_COLS if c in df}
+    X, _ = encoder.encode(columns, blood_pressure=(
+        df["bp_sys"].to_numpy(np.float32), df["bp_dia"].to_numpy(np.float32),
+        df["bp_valid"].to_numpy(bool),
+    ))
+    return X
+
+
+def wt_matrix(bundle):
+    df = WT.load_training_frame()
+    encoder = bundle["encoder"]
+    columns = {c: df[c].tolist() for c in df.columns}
+    return encoder.encode(columns, len(df))
+
+
+def timed(fn, repeat):
+    fn()  # warm-up (and compilation of the trees)
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def parity(reference, pred):
+    """Parity metrics and verdict: exact classes, or values within WT_TOLERANCE."""
+    if np.issubdtype(reference.dtype, np.integer):
+        agreement = float((pred == reference).mean())
+        return {"agreement": round(agreement, 6), "passed": agreement == 1.0}
+    max_abs_diff = float(np.abs(pred - reference).max())
+    return {"max_abs_diff": max_abs_diff, "tolerance": WT_TOLERANCE, "passed": max_abs_diff <= WT_TOLERANCE}
+
+
+def run(name, model, X_all, sizes, backends, repeat, check_only=False):
+    """Print one line per (backend, size); returns False if a parity check failed."""
+    rng = np.random.default_rng(0)
+    passed = True
+    for size in sizes:
+        X = X_all[rng.integers(0, len(X_all), size)]
+        reference = np.asarray(model.predict(X))
+        for backend in backends:
+            result = parity(reference, np.asarray(inference.predict(model, X, backend)))
+            passed &= result["passed"]
+            out = {"model": name, "backend": backend, "rows": size, **result}
+            if not check_only:
+                seconds = timed(lambda: inference.predict(model, X, backend), repeat if size < 100_000 else 1)
+                out.update({"ms": round(seconds * 1000, 3), "rows_per_s": round(size / seconds)})
+            print(json.dumps(out), flush=True)
+    return passed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 100, 10_000, 1_000_000])
+    parser.add_argument("--backends", nargs="+", choices=inference.BACKENDS, default=list(inference.BACKENDS))
+    parser.add_argument("--models", nargs="+", choices=["triage", "wt"], default=["triage", "wt"])
+    parser.add_argument("--repeat", type=int, default=20, help="timed runs per point (best is kept)")
+    parser.add_argument("--check", action="store_true",
+                        help="parity check only, on small batches (no timings)")
+    args = parser.parse_args(argv)
+    sizes = CHECK_SIZES if args.check else args.sizes
+
+    passed = True
+    if "triage" in args.models:
+        bundle = TrieXGB.load_model()
+        passed &= run("triage", bundle["model"], triage_matrix(bundle), sizes, args.backends,
+                      args.repeat, args.check)
+    if "wt" in args.models:
+        bundle = WT.load_model()
+        passed &= run("wt", bundle["model"], wt_matrix(bundle), sizes, args.backends,
+                      args.repeat, args.check)
+    if not passed:
+        print("Parity check failed: a backend diverges from model.predict", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
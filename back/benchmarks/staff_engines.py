@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Compare the EventMl staff-assignment engines (one booster per staff member vs
+a single multi_output_tree booster) on synthetic rosters of growing size.
+
+The slots (dates, shifts, ratings) come from EventMl/generated_events.csv;
+only the doctor column is replaced by N synthetic members, each tied to a
+home (weekday, shift) cell so that there is something to learn.
+
+    python benchmarks/staff_engines.py                      # 50 / 200 / 1000 staff
+    python benchmarks/staff_engines.py --sizes 50 --n-estimators 50
+
+Prints one JSON object per (size, engine) on stdout.
+"""
+import argparse
+import io
+import json
+import os
+import pickle
+import sys
+import time
+from contextlib import redirect_stdout
+
+import numpy as np
+from sklearn.metrics import f1_score
+from sklearn.model_selection import train_test_split
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from mlcommon.scripts import import_script  # noqa: E402
+
+event_model = import_script("event_model", "EventMl/event_model.py")
+
+
+def synthetic_roster(df, n_staff, p_home=0.8, p_other=0.005, seed=0):
+    """
+    Replace the doctors of every slot with ``n_staff`` synthetic ids.
+    Every member gets a home (weekday, shift) cell where they work with
+    probability ``p_home`` and only occasionally elsewhere; every slot keeps
+    at least one member.
+    """
+    rng = np.random.default_rng(seed)
+    shifts = list(event_model.SHIFTS)
+    home = rng.integers(0, 7 * len(shifts), n_staff)
+
+    cell = df["start"].dt.dayofweek.to_numpy() * len(shifts) \
+        + df["shift"].map(shifts.index).to_numpy()
+    prob = np.where(cell[:, None] == home[None, :], p_home, p_other)
+    flags = rng.random(prob.shape) < prob
+    empty = ~flags.any(axis=1)
+    flags[empty, rng.integers(0, n_staff, empty.sum())] = True
+
+    ids = np.array([f"{i:024x}" for i in range(n_staff)], dtype=object)
+    out = df.copy()
+    out["doctor_ids"] = [list(ids[row]) for row in flags]
+    return out
+
+
+def run(df, engine, n_estimators):
+    X, Y, _, mlb, _, _ = event_model.build_features(df.copy())
+    X_tr, X_te, Y_tr, Y_te = train_test_split(X, Y, test_size=0.2, random_state=42)
+
+    model = event_model.make_staff_model(Y.shape[1], engine)
+    model.set_params(**{
+        ("estimator__xgb__n_estimators" if engine == "per_staff" else "xgb__n_estimators"): n_estimators
+    })
+
+    start = time.perf_counter()
+    with redirect_stdout(io.StringIO()):
+        model.fit(X_tr, Y_tr)
+    train_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    Y_pred = np.asarray(model.predict(X_te))
+    predict_s = time.perf_counter() - start
+
+    week = X_te.iloc[:21]
+    start = time.perf_counter()
+    model.predict(week)
+    week_ms = (time.perf_counter() - start) * 1000
+
+    return {
+        "engine": engine,
+        "staff": int(Y.shape[1]),
+        "n_estimators": n_estimators,
+        "train_s": round(train_s, 3),
+        "predict_s": round(predict_s, 3),
+        "predict_week_ms": round(week_ms, 2),
+        "model_bytes": len(pickle.dumps(model)),
+        "micro_f1": round(float(f1_score(Y_te, Y_pred, average="micro", zero_division=0)), 4),
+        "samples_f1": round(float(f1_score(Y_te, Y_pred, average="samples", zero_division=0)), 4),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 200, 1000])
+    parser.add_argument("--engines", nargs="+", choices=event_model.ENGINES, default=list(event_model.ENGINES))
+    parser.add_argument("--n-estimators", type=int, default=event_model.XGB_PARAMS["n_estimators"])
+    parser.add_argument("--rows", type=int, default=None, help="subsample the events CSV")
+    args = parser.parse_args(argv)
+
+    df = event_model.load_events()
+    if args.rows:
+        df = df.sample(args.rows, random_state=0).reset_index(drop=True)
+
+    for n_staff in args.sizes:
+        roster = synthetic_roster(df, n_staff)
+        for engine in args.engines:
+            print(json.dumps(run(roster, engine, args.n_estimators)), flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark of the four ML entry points (TrieXGB, WT, the chatbot
+and event_model) on synthetic data of growing size.
+
+For every scale a sandbox is built under ``--workdir``: the scripts and
+mlcommon are symlinked in the usual layout next to synthetic CSVs (see
+benchmarks/synthetic.py), so artifacts and caches stay out of the real
+tree.  Each (entry point, phase) then runs in a fresh process against an
+in-memory MongoDB (mongomock) seeded with as many documents as the scale:
+
+    train   import + training from the CSV (chatbot: knowledge base and
+            symptom embeddings with an empty cache)
+    serve   cold start (process start to model ready, from the artifacts),
+            per-request latency percentiles and, for the scorers, a batch
+            pass over the whole collection
+
+and reports its peak RSS.  Results are written as one JSON file tagged with
+the git revision, so two runs can be compared:
+
+    python benchmarks/suite.py                                  # all entries, 1k and 10k rows
+    python benchmarks/suite.py --entries triage wait_time --scales 1000 100000
+    python benchmarks/suite.py compare results/a.json results/b.json
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from datetime import datetime
+
+import numpy as np
+
+import synthetic
+
+BACK_DIR = synthetic.BACK_DIR
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+ENTRIES = ("triage", "wait_time", "chat", "schedule")
+PHASES = ("train", "serve")
+# Requests of the slower entry points are capped to keep runs short.
+MAX_SCHEDULE_REQUESTS = 20
+
+SANDBOX_LINKS = (
+    "mlcommon",
+    "TrieML/TrieXGB.py",
+    "WT/WT.py",
+    "EventMl/event_model.py",
+    "ChatBotMl/src",
+)
+DATASETS = {
+    "triage": ("TrieML/patient_dataset_10000.csv", synthetic.triage_rows),
+    "wait_time": ("WT/patient_dataset_WT.csv", synthetic.wait_time_rows),
+    "schedule": ("EventMl/generated_events.csv", synthetic.event_rows),
+    "chat": ("ChatBotMl/data/final_chatbot_medical_dataset_multilingual.csv", synthetic.chatbot_rows),
+}
+
+
+# --- Sandbox ---
+def build_sandbox(root, scale, entries):
+    """Symlink the scripts under ``root`` and write the synthetic CSVs of ``entries``."""
+    for relative in SANDBOX_LINKS:
+        link = os.path.join(root, relative)
+        os.makedirs(os.path.dirname(link), exist_ok=True)
+        if not os.path.lexists(link):
+            os.symlink(os.path.join(BACK_DIR, relative), link)
+    for entry in entries:
+        relative, generate = DATASETS[entry]
+        path = os.path.join(root, relative)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        generate(scale).to_csv(path, index=False)
+
+
+# --- Mesures (processus enfant) ---
+def percentiles(latencies_ms):
+    if not latencies_ms:
+        return {}
+    p50, p95, p99 = np.percentile(latencies_ms, [50, 95, 99])
+    return {
+        "requests": len(latencies_ms),
+        "p50_ms": round(float(p50), 3),
+        "p95_ms": round(float(p95), 3),
+        "p99_ms": round(float(p99), 3),
+        "max_ms": round(float(max(latencies_ms)), 3),
+    }
+
+
+def timed_requests(fn, items):
+    latencies = []
+    for item in items:
+        start = time.perf_counter()
+        fn(item)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return percentiles(latencies)
+
+
+def batch_pass(predict_stream, bundle, collection, n_docs):
+    start = time.perf_counter()
+    written = predict_stream(bundle, collection, io.StringIO())
+    seconds = time.perf_counter() - start
+    if isinstance(written, tuple):
+        written = written[0]
+    return {"docs": written, "batch_s": round(seconds, 3), "docs_per_s": round(n_docs / seconds) if seconds else None}
+
+
+def run_scorer(name, relative_path, phase, ctx, make_docs, collection_name, predict_one):
+    t = time.perf_counter()
+    module = ctx["import_script"](name, relative_path)
+    out = {"import_s": round(time.perf_counter() - t, 3)}
+    if phase == "train":
+        t = time.perf_counter()
+        module.load_model(force_train=True)
+        out["train_s"] = round(time.perf_counter() - t, 3)
+        return out
+
+    bundle = module.load_model()
+    out["cold_start_s"] = ctx["since_spawn"]()
+    docs = make_docs(ctx["scale"])
+    collection = ctx["mongo"].get_collection(collection_name)
+    ctx["mongo"].insert_many(collection, docs)
+    rng = np.random.default_rng(0)
+    sample = [docs[i] for i in rng.integers(0, len(docs), ctx["requests"])]
+    out["latency"] = timed_requests(lambda doc: predict_one(module, bundle, doc), sample)
+    out["batch"] = batch_pass(module.predict_stream, bundle, collection, len(docs))
+    return out
+
+
+def run_triage(phase, ctx):
+    return run_scorer(
+        "TrieXGB", "TrieML/TrieXGB.py", phase, ctx,
+        lambda n: synthetic.patient_docs(synthetic.triage_rows(n, seed=1)), "patientdatas",
+        lambda module, bundle, doc: module.predict_patients(bundle, [doc]),
+    )
+
+
+def run_wait_time(phase, ctx):
+    return run_scorer(
+        "WT", "WT/WT.py", phase, ctx,
+        lambda n: synthetic.wt_docs(synthetic.wait_time_rows(n, seed=1)), "WT",
+        lambda module, bundle, doc: module.predict_docs(bundle, [doc]),
+    )
+
+
+def run_chat(phase, ctx):
+    if phase == "train":
+        shutil.rmtree(os.path.join(ctx["sandbox"], "ChatBotMl", "cache"), ignore_errors=True)
+    t = time.perf_counter()
+    chatbot_main = ctx["import_script"]("chatbot_main", "ChatBotMl/src/main.py")
+    out = {"import_s": round(time.perf_counter() - t, 3)}
+    t = time.perf_counter()
+    # eager: the model and symptom embeddings are built here, as before the
+    # background preload, not inside the first timed requests
+    service = chatbot_main.ChatbotService(preload="eager")
+    if not service.chatbot:
+        raise RuntimeError("Chatbot initialization failed (see stderr)")
+    if phase == "train":
+        out["train_s"] = round(time.perf_counter() - t, 3)
+        return out
+
+    out["cold_start_s"] = ctx["since_spawn"]()
+    kb = synthetic.chatbot_rows(ctx["scale"])
+    out["latency"] = timed_requests(service.process_query, synthetic.chatbot_queries(kb, ctx["requests"]))
+    return out
+
+
+def run_schedule(phase, ctx):
+    ctx["mongo"].insert_many(
+        ctx["mongo"].get_collection("users"),
+        synthetic.staff_users(synthetic.event_rows(ctx["scale"]))
+    )
+    t = time.perf_counter()
+    event_model = ctx["import_script"]("event_model", "EventMl/event_model.py")
+    out = {"import_s": round(time.perf_counter() - t, 3)}
+    t = time.perf_counter()
+    state = event_model.load_or_train(force_train=phase == "train")
+    if phase == "train":
+        out["train_s"] = round(time.perf_counter() - t, 3)
+        return out
+
+    out["cold_start_s"] = ctx["since_spawn"]()
+
+    def schedule_week(_):
+        event_model.insert_into_mongo(event_model.generate_next_week(*state))
+
+    out["latency"] = timed_requests(schedule_week, range(min(ctx["requests"], MAX_SCHEDULE_REQUESTS)))
+    return out
+
+
+RUNNERS = {"triage": run_triage, "wait_time": run_wait_time, "chat": run_chat, "schedule": run_schedule}
+
+
+def child(args):
+    """Run one (entry, phase) in this process and print its metrics as JSON."""
+    sys.path.insert(0, args.sandbox)
+    from mlcommon import mongo
+    from mlcommon.scripts import import_script
+
+    ctx = {
+        "sandbox": args.sandbox,
+        "scale": args.scale,
+        "requests": args.requests,
+        "import_script": import_script,
+        "mongo": mongo,
+        "since_spawn": lambda: round(time.time() - args.spawned_at, 3),
+    }
+    # the scripts' own logs would mix with the result line
+    with redirect_stdout(sys.stderr):
+        out = RUNNERS[args.entry](args.phase, ctx)
+    out["peak_rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    print(json.dumps(out))
+
+
+# --- Orchestration ---
+def run_child(entry, phase, sandbox, scale, requests, timeout):
+    cmd = [
+        sys.executable, os.path.abspath(__file__), "child",
+        "--entry", entry, "--phase", phase, "--sandbox", sandbox,
+        "--scale", str(scale), "--requests", str(requests),
+        "--spawned-at", repr(time.time()),
+    ]
+    env = dict(os.environ, MONGODB_URI="mongomock://")
+    try:
+        proc = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout, env=env)
+    except subprocess.TimeoutExpired:
+        return {"error": f"timeout after {timeout}s"}
+    lines = proc.stdout.strip().splitlines()
+    if proc.returncode != 0 or not lines:
+        # messages and the exception line, without the traceback frames
+        lines = [line for line in proc.stderr.splitlines()
+                 if line.strip() and not line.startswith((" ", "Traceback"))]
+        return {"error": " | ".join(lines[-2:]) or f"exit code {proc.returncode}"}
+    return json.loads(lines[-1])
+
+
+def git_revision():
+    try:
+        rev = subprocess.run(["git", "rev-parse", "HEAD"], cwd=BACK_DIR, capture_output=True,
+                             text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=BACK_DIR,
+                               capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+    return rev, bool(dirty)
+
+
+def run_suite(args):
+    revision, dirty = git_revision()
+    report = {
+        "revision": revision,
+        "dirty": dirty,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "scales": args.scales,
+        "requests": args.requests,
+        "results": [],
+    }
+    workdir = args.workdir or tempfile.mkdtemp(prefix="ml-bench-")
+    try:
+        for scale in args.scales:
+            sandbox = os.path.join(workdir, f"scale-{scale}")
+            build_sandbox(sandbox, scale, args.entries)
+            for entry in args.entries:
+                result = {"entry": entry, "scale": scale}
+                for phase in PHASES:
+                    result[phase] = run_child(entry, phase, sandbox, scale, args.requests, args.timeout)
+                print(json.dumps(result), flush=True)
+                report["results"].append(result)
+    finally:
+        if not args.workdir and not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"{datetime.now():%Y%m%d-%H%M%S}-{(revision or 'norev')[:10]}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as fh:
+        json.dump(report, fh, indent=2)
+    print(f"Results written to {output}", file=sys.stderr)
+
+
+# --- Comparaison ---
+def flatten(result, prefix=""):
+    """``{"train.train_s": 1.2, "serve.latency.p95_ms": 3.4, ...}`` of the numeric metrics."""
+    out = {}
+    for key, value in result.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            out.update(flatten(value, f"{name}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool) and key != "scale":
+            out[name] = value
+    return out
+
+
+def compare(args):
+    """One JSON line per metric present in both runs, with the relative change."""
+    with open(args.old) as fh:
+        old = json.load(fh)
+    with open(args.new) as fh:
+        new = json.load(fh)
+    old_results = {(r["entry"], r["scale"]): flatten(r) for r in old["results"]}
+    for result in new["results"]:
+        key = (result["entry"], result["scale"])
+        if key not in old_results:
+            continue
+        before = old_results[key]
+        for metric, value in flatten(result).items():
+            if metric not in before:
+                continue
+            change = (value - before[metric]) / before[metric] * 100 if before[metric] else None
+            print(json.dumps({
+                "entry": key[0],
+                "scale": key[1],
+                "metric": metric,
+                "old": before[metric],
+                "new": value,
+                "change_pct": None if change is None else round(change, 1),
+                "regression": change is not None and change > args.threshold
+                              and not metric.endswith(("docs_per_s", "docs", "requests")),
+            }))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    sub = parser.add_subparsers(dest="command")
+
+    run = sub.add_parser("run", help="run the suite (default)")
+    run.add_argument("--entries", nargs="+", choices=ENTRIES, default=list(ENTRIES))
+    run.add_argument("--scales", type=int, nargs="+", default=[1000, 10_000],
+                     help="rows of every synthetic CSV and documents in every collection")
+    run.add_argument("--requests", type=int, default=200, help="single requests timed per entry")
+    run.add_argument("--timeout", type=int, default=3600, help="seconds allowed per phase")
+    run.add_argument("--workdir", default=None, help="sandbox directory (default: a temporary one)")
+    run.add_argument("--keep", action="store_true", help="keep the temporary sandboxes")
+    run.add_argument("--output", default=None, help="result file (default: benchmarks/results/<date>-<rev>.json)")
+
+    cmp_ = sub.add_parser("compare", help="compare two result files")
+    cmp_.add_argument("old")
+    cmp_.add_argument("new")
+    cmp_.add_argument("--threshold", type=float, default=10.0,
+                      help="flag metrics that grew by more than this percentage")
+
+    worker = sub.add_parser("child")
+    worker.add_argument("--entry", choices=ENTRIES, required=True)
+    worker.add_argument("--phase", choices=PHASES, required=True)
+    worker.add_argument("--sandbox", required=True)
+    worker.add_argument("--scale", type=int, required=True)
+    worker.add_argument("--requests", type=int, required=True)
+    worker.add_argument("--spawned-at", type=float, required=True)
+
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] not in ("run", "compare", "child", "-h", "--help"):
+        argv = ["run"] + list(argv)
+    args = parser.parse_args(argv)
+    {"run": run_suite, "compare": compare, "child": child}[args.command](args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Synthetic datasets with the schemas of the shipped training CSVs, at any size.
+
+Rows are drawn from the real CSVs (the "templates") and perturbed, so the
+columns, value vocabularies and feature/label relations stay realistic:
+
+    triage_rows     TrieML/patient_dataset_10000.csv        numbers jittered
+    wait_time_rows  WT/patient_dataset_WT.csv               identities made unique
+    event_rows      EventMl/generated_events.csv            consecutive days, 3 shifts each
+    chatbot_rows    ChatBotMl/data/...multilingual.csv      numbered symptom variants
+
+plus the MongoDB documents the scripts read (``patient_docs``, ``wt_docs``,
+``staff_users``).
+"""
+import os
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+from bson import ObjectId
+
+BACK_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEMPLATES = {
+    "triage": "TrieML/patient_dataset_10000.csv",
+    "wait_time": "WT/patient_dataset_WT.csv",
+    "events": "EventMl/generated_events.csv",
+    "chatbot": "ChatBotMl/data/final_chatbot_medical_dataset_multilingual.csv",
+}
+SHIFTS_HOURS = {"Morning": (8, 16), "Evening": (16, 24), "Night": (0, 8)}
+
+
+def template(name):
+    return pd.read_csv(os.path.join(BACK_DIR, TEMPLATES[name]))
+
+
+def _resample(df, n, rng):
+    return df.iloc[rng.integers(0, len(df), n)].reset_index(drop=True)
+
+
+def _jitter(values, rng, spread, low, high):
+    return np.clip(values + rng.integers(-spread, spread + 1, len(values)), low, high)
+
+
+def _jitter_pressure(values, rng):
+    parts = values.str.split("/", expand=True).astype(int)
+    sys_ = _jitter(parts[0].to_numpy(), rng, 3, 70, 220)
+    dia = _jitter(parts[1].to_numpy(), rng, 3, 40, 140)
+    return [f"{s}/{d}" for s, d in zip(sys_, dia)]
+
+
+def triage_rows(n, seed=0):
+    rng = np.random.default_rng(seed)
+    df = _resample(template("triage"), n, rng)
+    df["age"] = _jitter(df["age"].to_numpy(), rng, 2, 0, 110)
+    df["glycemicIndex"] = _jitter(df["glycemicIndex"].to_numpy(), rng, 3, 40, 400)
+    df["oxygenSaturation"] = _jitter(df["oxygenSaturation"].to_numpy(), rng, 1, 50, 100)
+    df["bloodPressure"] = _jitter_pressure(df["bloodPressure"], rng)
+    return df
+
+
+def wait_time_rows(n, seed=0):
+    rng = np.random.default_rng(seed)
+    df = _resample(template("wait_time"), n, rng)
+    ids = np.arange(n)
+    df["firstName"] = [f"First{i}" for i in ids]
+    df["lastName"] = [f"Last{i}" for i in rng.integers(0, 10_000, n)]
+    df["email"] = [f"user{i}@example.com" for i in ids]
+    df["phoneNumber"] = [f"555-{i:07d}" for i in rng.integers(0, 10_000_000, n)]
+    df["insuranceNumber"] = [f"INS{i:06d}" for i in rng.integers(0, 1_000_000, n)]
+    df["num_patients_waiting"] = _jitter(df["num_patients_waiting"].to_numpy(), rng, 2, 0, 200)
+    df["waiting_time_minutes"] = np.round(
+        df["waiting_time_minutes"].to_numpy() + rng.normal(0, 1.0, n), 2
+    ).clip(0)
+    return df
+
+
+def event_rows(n, seed=0, first_day=datetime(2025, 1, 1)):
+    """``n`` consecutive shift slots (Morning, Evening, Night per day)."""
+    rng = np.random.default_rng(seed)
+    tpl = template("events")
+    shifts = list(SHIFTS_HOURS)
+    rows = []
+    by_shift = {sh: tpl[tpl["shift"] == sh].reset_index(drop=True) for sh in shifts}
+    for k in range(n):
+        day = first_day + timedelta(days=k // len(shifts))
+        sh = shifts[k % len(shifts)]
+        src = by_shift[sh].iloc[int(rng.integers(0, len(by_shift[sh])))]
+        h0, h1 = SHIFTS_HOURS[sh]
+        start = day.replace(hour=h0)
+        end = (day + timedelta(days=1)).replace(hour=0) if h1 == 24 else day.replace(hour=h1)
+        rows.append({
+            "title": f"{sh} Shift - {day.date()}",
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "assignedDoctors": src["assignedDoctors"],
+            "assignedNurses": src["assignedNurses"],
+            "shift": sh,
+            "description": src["description"],
+            "createdBy": src["createdBy"],
+            "rating": round(float(np.clip(src["rating"] + rng.normal(0, 0.1), 1, 5)), 2),
+        })
+    return pd.DataFrame(rows, columns=tpl.columns)
+
+
+def chatbot_rows(n, seed=0):
+    """
+    ``n`` knowledge-base rows.  Beyond the template size, the symptoms are
+    numbered variants ("nausea 2", "nausée 2"...), so the vocabulary grows
+    with the data.
+    """
+    rng = np.random.default_rng(seed)
+    tpl = template("chatbot")
+    df = _resample(tpl, n, rng)
+    variant = np.arange(n) // len(tpl)
+    for col in ("Symptom_EN", "Symptom_FR", "Symptom_AR"):
+        df[col] = [
+            s if v == 0 or not isinstance(s, str) else f"{s} {v + 1}"
+            for s, v in zip(df[col], variant)
+        ]
+    return df
+
+
+def chatbot_queries(df, n, seed=0):
+    """User messages mentioning a known symptom, in the three languages."""
+    rng = np.random.default_rng(seed)
+    prefixes = {"Symptom_EN": "I have ", "Symptom_FR": "j'ai ", "Symptom_AR": "عندي "}
+    queries = []
+    for i in rng.integers(0, len(df), n):
+        row = df.iloc[int(i)]
+        col = ("Symptom_EN", "Symptom_FR", "Symptom_AR")[int(rng.integers(0, 3))]
+        if not isinstance(row[col], str):
+            col = "Symptom_EN"
+        queries.append(prefixes[col] + row[col])
+    return queries
+
+
+def patient_docs(df):
+    """``patientdatas`` documents (symptom lists, ObjectId in insertion order)."""
+    return [
+        {
+            "_id": ObjectId(),
+            "age": int(r.age),
+            "symptoms": [s.strip() for s in str(r.symptoms).split(",") if s.strip()],
+            "bloodPressure": r.bloodPressure,
+            "glycemicIndex": int(r.glycemicIndex),
+            "oxygenSaturation": int(r.oxygenSaturation),
+            "state": r.state,
+        }
+        for r in df.itertuples(index=False)
+    ]
+
+
+def wt_docs(df):
+    """``WT`` documents without the target column."""
+    records = df.drop(columns=["waiting_time_minutes"]).to_dict("records")
+    for record in records:
+        record["_id"] = ObjectId()
+    return records
+
+
+def staff_users(events):
+    """``users`` documents for every doctor and nurse referenced by ``events``."""
+    users = []
+    for column, role in (("assignedDoctors", "Doctor"), ("assignedNurses", "Nurse")):
+        ids = sorted({i for v in events[column].dropna() for i in v.split("|") if i})
+        users.extend({"_id": ObjectId(i), "role": role} for i in ids)
+    return users
@@ -0,0 +1,5 @@
+# back/mlcommon/__init__.py
+#
+# Helpers shared by the Python ML scripts (TrieML, WT, EventMl, ChatBotMl).
+# The scripts are launched by path from Node, so each one adds ``back/`` to
+# ``sys.path`` before importing from this package.
@@ -0,0 +1,71 @@
+import hashlib
+import json
+import os
+import tempfile
+
+import joblib
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    """Return the hex SHA-256 of a file's content."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def fingerprint(paths=(), params=None, version=1):
+    """
+    Build a stable fingerprint from the content of some files, a dict of
+    hyperparameters and an artifact format version.  Any change to one of
+    them produces a different value, which invalidates saved artifacts.
+    """
+    digest = hashlib.sha256()
+    digest.update(f"v{version}".encode())
+    for path in paths:
+        digest.update(file_sha256(path).encode())
+    digest.update(json.dumps(params or {}, sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+
+def _current_umask():
+    # os.umask can only be read by setting it
+    mask = os.umask(0)
+    os.umask(mask)
+    return mask
+
+
+def save_artifact(path, payload):
+    """
+    Atomically write ``payload`` (a dict) with joblib.  The file gets the
+    usual permissions (0666 minus the umask), not mkstemp's 0600, so a
+    server running as another user can still load it.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    os.close(fd)
+    try:
+        joblib.dump(payload, tmp_path)
+        os.chmod(tmp_path, 0o666 & ~_current_umask())
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def load_artifact(path, expected_fingerprint):
+    """
+    Load an artifact written by ``save_artifact``.  Returns None when the file
+    is missing, unreadable or was built from a different fingerprint.
+    """
+    if not os.path.isfile(path):
+        return None
+    try:
+        payload = joblib.load(path)
+    except Exception:
+        return None
+    if not isinstance(payload, dict) or payload.get("fingerprint") != expected_fingerprint:
+        return None
+    return payload
@@ -0,0 +1,129 @@
+"""
+Columnar cache of the training CSVs.
+
+``load_prepared`` parses a CSV once, lets the owning script derive its typed
+columns (``prepare``: blood pressure split, symptom/staff lists, dates,
+categoricals, int16/float32 downcasts) and stores the result as an
+uncompressed Arrow IPC file next to the model artifacts, keyed by the CSV
+hash.  Later loads memory-map that file instead of re-parsing the CSV.
+Without pyarrow every load falls back to ``pd.read_csv`` + ``prepare``.
+
+    python mlcommon/datasets.py     # compile the TrieML, WT and EventMl datasets
+"""
+import glob
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc  # noqa: F401
+except ImportError:  # optional: plain CSV parsing without it
+    pa = None
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from mlcommon.artifacts import file_sha256  # noqa: E402
+
+# Bump when the layout of the cached files changes.
+CACHE_VERSION = 1
+
+
+def cache_path(csv_path, version=1):
+    """``<script dir>/artifacts/<csv name>-<hash>-v<version>.arrow``."""
+    stem = os.path.splitext(os.path.basename(csv_path))[0]
+    digest = file_sha256(csv_path)[:16]
+    directory = os.path.join(os.path.dirname(os.path.abspath(csv_path)), "artifacts")
+    return os.path.join(directory, f"{stem}-{digest}-v{CACHE_VERSION}.{version}.arrow")
+
+
+def downcast(series):
+    """Integer columns to the smallest int type (int16 for ages, rates...), floats to float32."""
+    if pd.api.types.is_integer_dtype(series):
+        return pd.to_numeric(series, downcast="integer")
+    if pd.api.types.is_float_dtype(series):
+        return series.astype(np.float32)
+    return series
+
+
+def categorical(series):
+    """String column as a categorical (missing values stay missing)."""
+    return series.astype("category")
+
+
+def split_lists(series, sep):
+    """``"a<sep>b"`` strings to lists of stripped, non-empty tokens."""
+    return [
+        [token.strip() for token in value.split(sep) if token.strip()] if isinstance(value, str) else []
+        for value in series
+    ]
+
+
+def load_prepared(csv_path, prepare, version=1, **read_csv_kwargs):
+    """
+    DataFrame of ``prepare(pd.read_csv(csv_path, **read_csv_kwargs))``,
+    served from the memory-mapped Arrow cache when it matches the CSV.
+    ``version`` belongs to ``prepare``: bump it when its output changes.
+    """
+    if pa is None:
+        return prepare(pd.read_csv(csv_path, **read_csv_kwargs))
+
+    path = cache_path(csv_path, version)
+    if os.path.isfile(path):
+        try:
+            return _read_arrow(path)
+        except (OSError, pa.ArrowInvalid):
+            pass
+
+    df = prepare(pd.read_csv(csv_path, **read_csv_kwargs))
+    try:
+        _write_arrow(df, path)
+    except OSError as exc:
+        print(f"Dataset cache not written ({exc})", file=sys.stderr)
+        return df
+    return _read_arrow(path)
+
+
+def _write_arrow(df, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with pa.OSFile(tmp_path, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, path)
+    # older compilations of the same CSV
+    prefix = os.path.basename(path).rsplit("-", 2)[0]
+    for stale in glob.glob(os.path.join(os.path.dirname(path), f"{prefix}-*.arrow")):
+        if stale != path:
+            os.remove(stale)
+
+
+def _read_arrow(path):
+    with pa.memory_map(path, "r") as source:
+        table = pa.ipc.open_file(source).read_all()
+    # split_blocks: numeric columns without nulls stay views on the mapping
+    return table.to_pandas(split_blocks=True)
+
+
+def main():
+    from mlcommon.scripts import import_script
+
+    report = {}
+    for name, relative_path, loader in (
+        ("TrieXGB", "TrieML/TrieXGB.py", "load_training_frame"),
+        ("WT", "WT/WT.py", "load_training_frame"),
+        ("event_model", "EventMl/event_model.py", "load_events"),
+    ):
+        module = import_script(name, relative_path)
+        start = time.perf_counter()
+        df = getattr(module, loader)()
+        report[name] = {"rows": len(df), "seconds": round(time.perf_counter() - start, 3)}
+    print(json.dumps({"pyarrow": pa is not None, "datasets": report}))
+
+
+if __name__ == "__main__":
+    main()
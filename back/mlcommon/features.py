@@ -0,0 +1,217 @@
+"""
+Feature encoding shared by TrieML/TrieXGB.py and WT/WT.py.
+
+Everything here works on plain column arrays (a DataFrame column, or a list
+built from MongoDB documents) and writes straight into preallocated float32
+matrices, in the exact feature order the models were trained with.
+"""
+import numpy as np
+
+# Fixed encoding of the triage state.  Alphabetical, so it matches the
+# ``state_code`` column of patient_dataset_WT.csv and the codes pandas'
+# ``astype("category")`` used to give on the full training set.
+STATE_CODES = {"critical": 0, "low": 1, "moderate": 2}
+UNKNOWN_STATE = -1
+
+
+def records_to_columns(records, keys):
+    """Turn a list of dicts into {key: list of values} (None when missing)."""
+    return {key: [r.get(key) for r in records] for key in keys}
+
+
+def to_float32(values):
+    """Numeric column as float32; None or unparsable values become NaN."""
+    try:
+        return np.asarray(values, dtype=np.float32)
+    except (TypeError, ValueError):
+        out = np.empty(len(values), dtype=np.float32)
+        for i, v in enumerate(values):
+            try:
+                out[i] = float(v)
+            except (TypeError, ValueError):
+                out[i] = np.nan
+        return out
+
+
+def parse_blood_pressure(values):
+    """
+    Parse "sys/dia" strings.
+
+    Returns ``(bp_sys, bp_dia, valid)``: two float32 arrays and a boolean mask
+    of the rows where both parts are numbers.  Decimals are truncated, as the
+    models were trained on integer pressures.
+    """
+    raw = np.asarray(values, dtype=object).astype(str).reshape(-1)
+    if not len(raw):
+        empty = np.empty(0, dtype=np.float32)
+        return empty, empty.copy(), np.zeros(0, dtype=bool)
+    parts = np.char.partition(raw, "/").reshape(-1, 3)
+    head = np.char.strip(parts[:, 0])
+    tail = np.char.strip(parts[:, 2])
+    valid = _is_number(head) & _is_number(tail)
+    bp_sys = np.full(len(raw), np.nan, dtype=np.float32)
+    bp_dia = np.full(len(raw), np.nan, dtype=np.float32)
+    bp_sys[valid] = np.trunc(head[valid].astype(np.float32))
+    bp_dia[valid] = np.trunc(tail[valid].astype(np.float32))
+    return bp_sys, bp_dia, valid
+
+
+def _is_number(parts):
+    return np.char.isdigit(np.char.replace(parts, ".", "", count=1))
+
+
+def encode_states(values):
+    """Map state strings to the fixed codes; anything else is UNKNOWN_STATE."""
+    return np.fromiter(
+        (STATE_CODES.get(v, UNKNOWN_STATE) if isinstance(v, str) else UNKNOWN_STATE for v in values),
+        dtype=np.float32, count=len(values)
+    )
+
+
+def split_symptoms(value):
+    """Symptom tokens from a "a,b" string (CSV) or a list (MongoDB)."""
+    if isinstance(value, str):
+        items = value.split(",")
+    elif isinstance(value, (list, tuple, np.ndarray)):
+        items = value
+    else:
+        return []
+    return [s.strip() for s in items if isinstance(s, str) and s.strip()]
+
+
+class SymptomVocabulary:
+    """Frozen, ordered symptom vocabulary producing one-hot uint8 rows."""
+
+    def __init__(self, symptoms):
+        self.symptoms = tuple(symptoms)
+        self.index = {s: i for i, s in enumerate(self.symptoms)}
+
+    @classmethod
+    def fit(cls, values):
+        return cls(sorted({s for v in values for s in split_symptoms(v)}))
+
+    @property
+    def column_names(self):
+        return [f"sym_{s}" for s in self.symptoms]
+
+    def transform(self, values, out=None):
+        """
+        One-hot encode a column of symptom lists into ``out`` (allocated as
+        uint8 when not given).  Unknown symptoms are ignored.
+        """
+        if out is None:
+            out = np.zeros((len(values), len(self.symptoms)), dtype=np.uint8)
+        rows, cols = [], []
+        index = self.index
+        for i, value in enumerate(values):
+            for s in split_symptoms(value):
+                j = index.get(s)
+                if j is not None:
+                    rows.append(i)
+                    cols.append(j)
+        out[rows, cols] = 1
+        return out
+
+
+class TriageEncoder:
+    """
+    Feature matrix for the triage classifier:
+    ``age, glycemicIndex, oxygenSaturation, bp_sys, bp_dia, sym_*``.
+    The numeric block is standardized with the training mean/scale.
+    """
+
+    NUM_COLS = ("age", "glycemicIndex", "oxygenSaturation", "bp_sys", "bp_dia")
+    INPUT_COLS = ("age", "glycemicIndex", "oxygenSaturation", "bloodPressure", "symptoms")
+
+    def __init__(self, vocabulary, mean=None, scale=None):
+        self.vocabulary = vocabulary
+        self.mean = None if mean is None else np.asarray(mean, dtype=np.float32)
+        self.scale = None if scale is None else np.asarray(scale, dtype=np.float32)
+
+    @classmethod
+    def fit(cls, columns, blood_pressure=None):
+        """Freeze the vocabulary and scaling on training columns; returns (encoder, X, valid)."""
+        encoder = cls(SymptomVocabulary.fit(columns["symptoms"]))
+        X, valid = encoder.encode(columns, scale=False, blood_pressure=blood_pressure)
+        encoder.mean, encoder.scale = _standardize(X[:, :len(cls.NUM_COLS)])
+        return encoder, X, valid
+
+    @property
+    def feature_names(self):
+        return list(self.NUM_COLS) + self.vocabulary.column_names
+
+    def encode(self, columns, scale=True, blood_pressure=None):
+        """
+        ``columns`` maps the INPUT_COLS names to equally long sequences.
+        Returns ``(X, valid)``; rows whose blood pressure cannot be parsed
+        are left out of ``X`` and flagged False in ``valid``.  An already
+        parsed ``blood_pressure`` tuple can be passed to avoid parsing twice.
+        """
+        if blood_pressure is None:
+            blood_pressure = parse_blood_pressure(columns["bloodPressure"])
+        bp_sys, bp_dia, valid = blood_pressure
+        n_num = len(self.NUM_COLS)
+        symptoms = columns["symptoms"]
+        if not valid.all():
+            symptoms = [s for s, ok in zip(symptoms, valid) if ok]
+
+        X = np.zeros((int(valid.sum()), n_num + len(self.vocabulary.symptoms)), dtype=np.float32)
+        X[:, 0] = to_float32(columns["age"])[valid]
+        X[:, 1] = to_float32(columns["glycemicIndex"])[valid]
+        X[:, 2] = to_float32(columns["oxygenSaturation"])[valid]
+        X[:, 3] = bp_sys[valid]
+        X[:, 4] = bp_dia[valid]
+        if scale and self.mean is not None:
+            X[:, :n_num] -= self.mean
+            X[:, :n_num] /= self.scale
+        self.vocabulary.transform(symptoms, out=X[:, n_num:])
+        return X, valid
+
+
+class WaitTimeEncoder:
+    """
+    Feature matrix for the waiting-time regressor.  ``state_enc`` (and
+    ``state_code`` when the input does not carry it) come from STATE_CODES.
+    Columns absent from every record are filled with 0, as in training.
+    """
+
+    def __init__(self, feature_columns, mean=None, scale=None):
+        self.feature_columns = list(feature_columns)
+        self.mean = None if mean is None else np.asarray(mean, dtype=np.float32)
+        self.scale = None if scale is None else np.asarray(scale, dtype=np.float32)
+
+    @classmethod
+    def fit(cls, columns, feature_columns, n_rows):
+        """Freeze the scaling on training columns; returns (encoder, X)."""
+        encoder = cls(feature_columns)
+        X = encoder.encode(columns, n_rows, scale=False)
+        encoder.mean, encoder.scale = _standardize(X)
+        return encoder, X
+
+    def encode(self, columns, n_rows, scale=True):
+        X = np.zeros((n_rows, len(self.feature_columns)), dtype=np.float32)
+        states = columns.get("state")
+        for j, name in enumerate(self.feature_columns):
+            values = columns.get(name)
+            if values is not None and any(v is not None for v in values):
+                X[:, j] = to_float32(values)
+            elif name in ("state_enc", "state_code") and states is not None:
+                X[:, j] = encode_states(states)
+        if scale and self.mean is not None:
+            X -= self.mean
+            X /= self.scale
+        return X
+
+
+def _standardize(block):
+    """
+    Standardize ``block`` in place like sklearn's StandardScaler and return
+    the float32 (mean, scale) used.
+    """
+    mean = block.mean(axis=0, dtype=np.float64)
+    scale = block.std(axis=0, dtype=np.float64)
+    scale[scale == 0] = 1.0
+    mean, scale = mean.astype(np.float32), scale.astype(np.float32)
+    block -= mean
+    block /= scale
+    return mean, scale
@@ -0,0 +1,145 @@
+"""
+Prediction backends for the XGBoost models of TrieXGB and WT.
+
+    sklearn   the estimator's own ``predict`` (default)
+    inplace   ``Booster.inplace_predict`` on a contiguous float32 array,
+              without the sklearn wrapper and feature-name validation
+    compiled  the trees flattened into numpy arrays and walked for all
+              rows and trees at once; fastest for a handful of rows
+    auto      ``compiled`` for small batches, ``inplace`` above
+
+Selected with ``set_backend`` (the scripts' ``--backend`` flag) or the
+``ML_INFERENCE_BACKEND`` environment variable.  Classifiers return class
+indices and regressors values, like ``predict``.
+"""
+import json
+import os
+
+import numpy as np
+from xgboost import XGBClassifier
+
+BACKENDS = ("sklearn", "inplace", "compiled", "auto")
+# Largest batch ``auto`` sends to the compiled trees.
+AUTO_COMPILED_MAX_ROWS = 8
+# Rows walked at once by the compiled trees (bounds the rows x trees buffers).
+COMPILED_CHUNK_ROWS = 4096
+
+_backend = os.getenv("ML_INFERENCE_BACKEND", "sklearn")
+_compiled = {}
+
+
+def set_backend(name):
+    global _backend
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown inference backend {name!r} (expected one of {', '.join(BACKENDS)})")
+    _backend = name
+
+
+def get_backend():
+    return _backend
+
+
+def predict(model, X, backend=None):
+    """``model.predict(X)`` through the selected backend."""
+    backend = backend or _backend
+    if backend == "auto":
+        backend = "compiled" if len(X) <= AUTO_COMPILED_MAX_ROWS else "inplace"
+    if backend == "sklearn":
+        return model.predict(X)
+
+    X = np.ascontiguousarray(X, dtype=np.float32)
+    if backend == "inplace":
+        margin = model.get_booster().inplace_predict(X, validate_features=False, predict_type="margin")
+    elif backend == "compiled":
+        margin = compiled_trees(model).margin(X)
+    else:
+        raise ValueError(f"Unknown inference backend {backend!r}")
+    return _from_margin(model, np.asarray(margin))
+
+
+def _from_margin(model, margin):
+    if not isinstance(model, XGBClassifier):
+        return margin.reshape(len(margin), -1)[:, 0] if margin.ndim > 1 else margin
+    if margin.ndim > 1 and margin.shape[1] > 1:
+        return margin.argmax(axis=1)
+    return (margin.reshape(-1) > 0).astype(np.int64)
+
+
+def compiled_trees(model):
+    """``CompiledTrees`` of a fitted model, built once per model object."""
+    entry = _compiled.get(id(model))
+    if entry is None or entry[0] is not model:
+        entry = (model, CompiledTrees(model.get_booster()))
+        _compiled[id(model)] = entry
+    return entry[1]
+
+
+class CompiledTrees:
+    """
+    All trees of a (one output per tree) booster as flat node arrays:
+    every row descends every tree in ``depth`` vectorized steps, leaves
+    point to themselves, and the leaf values are summed per output group.
+    The base margin is measured once against the booster itself.
+    """
+
+    def __init__(self, booster):
+        model = json.loads(booster.save_raw("json"))["learner"]["gradient_booster"]["model"]
+        feature, threshold, left, right, default_left, roots = [], [], [], [], [], []
+        depth = 0
+        for tree in model["trees"]:
+            offset = sum(len(f) for f in feature)
+            lc = np.asarray(tree["left_children"], dtype=np.int64)
+            rc = np.asarray(tree["right_children"], dtype=np.int64)
+            leaf = lc == -1
+            own = np.arange(len(lc)) + offset
+            roots.append(offset)
+            feature.append(np.where(leaf, 0, tree["split_indices"]))
+            threshold.append(np.asarray(tree["split_conditions"], dtype=np.float32))
+            left.append(np.where(leaf, own, lc + offset))
+            right.append(np.where(leaf, own, rc + offset))
+            default_left.append(np.asarray(tree["default_left"], dtype=bool))
+            depth = max(depth, _tree_depth(lc, rc))
+
+        self.feature = np.concatenate(feature).astype(np.int64)
+        self.threshold = np.concatenate(threshold)
+        self.left = np.concatenate(left)
+        self.right = np.concatenate(right)
+        self.default_left = np.concatenate(default_left)
+        self.roots = np.asarray(roots, dtype=np.int64)
+        self.depth = depth
+
+        groups = np.asarray(model["tree_info"], dtype=np.int64)
+        n_groups = int(groups.max()) + 1 if len(groups) else 1
+        self.groups = np.zeros((len(groups), n_groups), dtype=np.float32)
+        self.groups[np.arange(len(groups)), groups] = 1
+        # leaves hold their value in split_conditions
+        self.value = self.threshold
+
+        probe = np.zeros((1, booster.num_features()), dtype=np.float32)
+        expected = np.asarray(booster.inplace_predict(probe, predict_type="margin"), dtype=np.float32)
+        self.bias = expected.reshape(1, -1) - self._leaf_sum(probe)
+
+    def _leaf_sum(self, X):
+        rows = np.arange(len(X))[:, None]
+        node = np.broadcast_to(self.roots, (len(X), len(self.roots))).copy()
+        for _ in range(self.depth):
+            x = X[rows, self.feature[node]]
+            go_left = np.where(np.isnan(x), self.default_left[node], x < self.threshold[node])
+            node = np.where(go_left, self.left[node], self.right[node])
+        return self.value[node] @ self.groups
+
+    def margin(self, X):
+        out = np.empty((len(X), self.groups.shape[1]), dtype=np.float32)
+        for start in range(0, len(X), COMPILED_CHUNK_ROWS):
+            chunk = X[start:start + COMPILED_CHUNK_ROWS]
+            out[start:start + len(chunk)] = self._leaf_sum(chunk) + self.bias
+        return out if out.shape[1] > 1 else out[:, 0]
+
+
+def _tree_depth(left, right):
+    depth, frontier = 0, [0]
+    while True:
+        children = [c for n in frontier for c in (left[n], right[n]) if c != -1]
+        if not children:
+            return depth
+        depth, frontier = depth + 1, children
@@ -0,0 +1,80 @@
+"""
+Shared MongoDB access for the ML scripts.
+
+One pooled ``MongoClient`` per process, configured like the Node backend
+(``MONGODB_URI`` / ``DATABASE_NAME`` from the environment).  Setting
+``MONGODB_URI=mongomock://`` (or calling ``set_client``) swaps in an
+in-memory ``mongomock`` client for local runs and benchmarks.
+"""
+import os
+import threading
+
+from pymongo import MongoClient, UpdateOne
+
+DB_NAME = os.getenv("DATABASE_NAME") or "pidevDB"
+POOL_SIZE = int(os.getenv("MONGO_POOL_SIZE", "20"))
+INSERT_BATCH_SIZE = 1000
+
+_lock = threading.Lock()
+_client = None
+_client_pid = None
+
+
+def get_client():
+    """Process-wide client, created on first use (and again after a fork)."""
+    global _client, _client_pid
+    with _lock:
+        if _client is None or _client_pid != os.getpid():
+            uri = os.getenv("MONGODB_URI")
+            if uri and uri.startswith("mongomock://"):
+                import mongomock
+                _client = mongomock.MongoClient()
+            else:
+                _client = MongoClient(uri, maxPoolSize=POOL_SIZE)
+            _client_pid = os.getpid()
+        return _client
+
+
+def set_client(client):
+    """Use ``client`` (e.g. ``mongomock.MongoClient()``) for this process."""
+    global _client, _client_pid
+    with _lock:
+        _client, _client_pid = client, os.getpid()
+
+
+def get_collection(name, db_name=None):
+    return get_client()[db_name or DB_NAME][name]
+
+
+def load_staff_ids(roles=("Doctor", "Nurse"), collection="users"):
+    """``{role: [_id, ...]}`` for every user of ``roles`` in ``collection``, in a single query."""
+    staff = {role: [] for role in roles}
+    cursor = get_collection(collection).find({"role": {"$in": list(roles)}}, {"_id": 1, "role": 1})
+    for user in cursor:
+        staff[user["role"]].append(user["_id"])
+    return staff
+
+
+def insert_many(collection, docs, batch_size=INSERT_BATCH_SIZE):
+    """Unordered ``insert_many`` in batches; returns the number of inserted documents."""
+    inserted = 0
+    for start in range(0, len(docs), batch_size):
+        result = collection.insert_many(docs[start:start + batch_size], ordered=False)
+        inserted += len(result.inserted_ids)
+    return inserted
+
+
+def bulk_update(collection, updates, batch_size=INSERT_BATCH_SIZE):
+    """
+    Unordered ``bulk_write`` of ``UpdateOne(filter, update)`` for each
+    ``(filter, update)`` pair, in batches; returns the number of modified
+    documents.  mongomock cannot execute pymongo's operation objects, so it
+    gets plain ``update_one`` calls.
+    """
+    if type(collection).__module__.startswith("mongomock"):
+        return sum(collection.update_one(f, u).modified_count for f, u in updates)
+    modified = 0
+    for start in range(0, len(updates), batch_size):
+        batch = [UpdateOne(f, u) for f, u in updates[start:start + batch_size]]
+        modified += collection.bulk_write(batch, ordered=False).modified_count
+    return modified
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Fused triage + wait-time pipeline.
+
+Runs the TrieXGB classifier on a ``patientdatas`` batch, orders the patients
+the way the nurse dashboard does (discharged last, then by severity), keeps
+the ones waiting for a doctor with their queue position, and feeds them
+straight into the WT regressor.  Nothing is written to MongoDB.
+"""
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from mlcommon.mongo import get_collection  # noqa: E402
+from mlcommon.scripts import import_script  # noqa: E402
+
+PRIORITY = {"critical": 1, "moderate": 2, "low": 3}
+WAITING_STATUS = "Waiting for Doctor"
+
+
+def queue_order(patients):
+    """Discharged patients last, then critical → moderate → low (stable)."""
+    def key(p):
+        discharged = str(p.get("status") or "").lower() == "discharged"
+        return (discharged, PRIORITY.get(p.get("state"), 99))
+    return sorted(patients, key=key)
+
+
+def count_available_staff():
+    """Number of distinct doctors and nurses assigned to at least one event."""
+    events = get_collection("events")
+    return len(events.distinct("assignedDoctors")), len(events.distinct("assignedNurses"))
+
+
+def build_queue(patients, available_doctors, available_nurses):
+    """Waiting patients in queue order, with the features WT expects."""
+    queue = []
+    for p in queue_order(patients):
+        if p.get("status") != WAITING_STATUS:
+            continue
+        entry = {k: v for k, v in p.items() if k != "createdAt"}
+        entry["available_doctors"] = available_doctors
+        entry["available_nurses"] = available_nurses
+        entry["num_patients_waiting"] = len(queue) + 1
+        queue.append(entry)
+    return queue
+
+
+def predict_queue(wt_bundle, patients, available_doctors, available_nurses):
+    """Waiting queue of already triaged patients, with predicted waiting times."""
+    wt = import_script("WT", "WT/WT.py")
+    queue = build_queue(patients, available_doctors, available_nurses)
+    _, predictions = wt.predict_docs(wt_bundle, queue)
+    return predictions
+
+
+def triage_and_wait(triage_bundle, wt_bundle, docs, available_doctors, available_nurses):
+    """Score raw patient documents and return the waiting queue with predicted waiting times."""
+    triexgb = import_script("TrieXGB", "TrieML/TrieXGB.py")
+    patients = triexgb.predict_patients(triage_bundle, docs)
+    return predict_queue(wt_bundle, patients, available_doctors, available_nurses)
+
+
+def main():
+    triexgb = import_script("TrieXGB", "TrieML/TrieXGB.py")
+    wt = import_script("WT", "WT/WT.py")
+    triage_bundle = triexgb.load_model()
+    wt_bundle = wt.load_model()
+
+    docs = triexgb.load_patients()
+    available_doctors, available_nurses = count_available_staff()
+    predictions = triage_and_wait(triage_bundle, wt_bundle, docs, available_doctors, available_nurses)
+    print(json.dumps(predictions, ensure_ascii=False, default=str))
+
+
+if __name__ == "__main__":
+    main()
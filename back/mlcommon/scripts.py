@@ -0,0 +1,27 @@
+import importlib.util
+import os
+import sys
+
+BACK_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_script(name, relative_path):
+    """
+    Import one of the standalone ML scripts (e.g. ``TrieML/TrieXGB.py``) as a
+    module.  Repeated calls return the already imported module.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    path = os.path.join(BACK_DIR, relative_path)
+    script_dir = os.path.dirname(path)
+    if script_dir not in sys.path:
+        sys.path.insert(0, script_dir)
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        del sys.modules[name]
+        raise
+    return module
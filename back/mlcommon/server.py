@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Resident inference server for the ML scripts.
+
+Loads the TrieML, WT, ChatBotMl and EventMl models once and answers calls
+(``triage``, ``wait_time``, ``triage_wait``, ``chat``, ``schedule``, ``stats``)
+over stdin/stdout, one JSON object per line:
+
+    -> {"id": 1, "method": "triage", "params": {}}
+    <- {"id": 1, "result": [...], "error": null, "latency_ms": 12.4}
+
+Calls are executed concurrently in a thread pool, so a long ``schedule`` run
+does not block ``chat`` answers.  Anything the models print goes to stderr;
+stdout only carries protocol lines.  A ``{"event": "ready", ...}`` line is
+emitted once every model has been loaded.
+"""
+import argparse
+import io
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from mlcommon import pipeline  # noqa: E402
+from mlcommon.scripts import import_script  # noqa: E402
+
+ALL_MODELS = ("triage", "wait_time", "chat", "schedule")
+
+
+class LatencyStats:
+    """Per-method call counters and latency samples."""
+
+    def __init__(self, max_samples=1000):
+        self._lock = threading.Lock()
+        self._max_samples = max_samples
+        self._samples = {}
+        self._errors = {}
+
+    def record(self, method, latency_ms, ok):
+        with self._lock:
+            samples = self._samples.setdefault(method, [])
+            samples.append(latency_ms)
+            if len(samples) > self._max_samples:
+                del samples[0]
+            if not ok:
+                self._errors[method] = self._errors.get(method, 0) + 1
+
+    def summary(self):
+        with self._lock:
+            out = {}
+            for method, samples in self._samples.items():
+                ordered = sorted(samples)
+                n = len(ordered)
+                out[method] = {
+                    "calls": n,
+                    "errors": self._errors.get(method, 0),
+                    "mean_ms": round(sum(ordered) / n, 3),
+                    "p50_ms": round(ordered[int(0.50 * (n - 1))], 3),
+                    "p95_ms": round(ordered[int(0.95 * (n - 1))], 3),
+                    "max_ms": round(ordered[-1], 3),
+                }
+            return out
+
+
+class InferenceServer:
+    def __init__(self, models=ALL_MODELS, workers=4):
+        self.models = tuple(models)
+        self.workers = workers
+        self.stats = LatencyStats()
+        self.load_times = {}
+        self.load_errors = {}
+        self.handlers = {
+            "ping": self.ping,
+            "stats": self.get_stats,
+        }
+        self._schedule_lock = threading.Lock()
+
+    # --- Chargement des modèles ---
+    def load(self):
+        loaders = {
+            "triage": self._load_triage,
+            "wait_time": self._load_wait_time,
+            "chat": self._load_chat,
+            "schedule": self._load_schedule,
+        }
+        for name in self.models:
+            start = time.perf_counter()
+            try:
+                loaders[name]()
+            except BaseException as exc:  # sys.exit() in a script must not kill the server
+                self.load_errors[name] = f"{type(exc).__name__}: {exc}"
+                print(f"Failed to load '{name}': {self.load_errors[name]}", file=sys.stderr)
+            self.load_times[name] = round((time.perf_counter() - start) * 1000, 1)
+        if "triage" in self.handlers and "wait_time" in self.handlers:
+            self.handlers["triage_wait"] = self.triage_wait
+
+    def _load_triage(self):
+        self.triexgb = import_script("TrieXGB", "TrieML/TrieXGB.py")
+        self.triage_bundle = self.triexgb.load_model()
+        self.triage_cache = self.triexgb.TriageCache.load(self.triage_bundle["fingerprint"])
+        self._triage_lock = threading.Lock()
+        self.handlers["triage"] = self.triage
+
+    def _load_wait_time(self):
+        self.wt = import_script("WT", "WT/WT.py")
+        self.wt_bundle = self.wt.load_model()
+        self.handlers["wait_time"] = self.wait_time
+
+    def _load_chat(self):
+        self.chatbot_main = import_script("chatbot_main", "ChatBotMl/src/main.py")
+        self.chatbot_service = self.chatbot_main.ChatbotService()
+        if not self.chatbot_service.chatbot:
+            raise RuntimeError("Chatbot initialization failed")
+        self.handlers["chat"] = self.chat
+
+    def _load_schedule(self):
+        self.event_model = import_script("event_model", "EventMl/event_model.py")
+        log_buffer = io.StringIO()
+        with redirect_stdout(log_buffer):
+            self.schedule_state = self.event_model.load_or_train()
+        self.schedule_log = log_buffer.getvalue().strip()
+        self.handlers["schedule"] = self.schedule
+
+    # --- Méthodes exposées ---
+    def ping(self, params):
+        return {"models": {name: name not in self.load_errors for name in self.models}}
+
+    def get_stats(self, params):
+        stats = {"load_ms": self.load_times, "load_errors": self.load_errors, "calls": self.stats.summary()}
+        if "chat" in self.handlers:
+            stats["chat"] = self.chatbot_service.metrics()
+        return stats
+
+    def _triage_patients(self, params):
+        # Only new or updated patients are scored; pass {"full": true} to rescore all.
+        with self._triage_lock:
+            records, self.triage_cache, stats = self.triexgb.predict_incremental(
+                self.triage_bundle, self.triexgb.patients_collection(), self.triage_cache,
+                full=bool(params.get("full")),
+            )
+        print(f"Incremental triage: {stats['scored']} scored, {stats['reused']} reused", file=sys.stderr)
+        return records
+
+    def triage(self, params):
+        return self._triage_patients(params)
+
+    def wait_time(self, params):
+        docs = self.wt.load_wt_docs()
+        test_metrics, predictions = self.wt.predict_docs(self.wt_bundle, docs)
+        return {
+            "validation": self.wt_bundle["validation"],
+            "test": test_metrics,
+            "predictions": predictions,
+        }
+
+    def triage_wait(self, params):
+        patients = self._triage_patients(params)
+        available_doctors, available_nurses = pipeline.count_available_staff()
+        return pipeline.predict_queue(self.wt_bundle, patients, available_doctors, available_nurses)
+
+    def chat(self, params):
+        query = str(params.get("query", ""))
+        if params.get("multi"):
+            k = params.get("k")
+            # analyze_query rejects k < 1 with a ValueError
+            return self.chatbot_service.analyze_query(query, self.chatbot_main.TOP_K_SYMPTOMS if k is None else k)
+        result = {"response": self.chatbot_service.process_query(query)}
+        if self.chatbot_service.degraded:
+            # semantic fallback unavailable, details in stats["chat"]["semantic"]
+            result["degraded"] = True
+        return result
+
+    def schedule(self, params):
+        # Invalid options are rejected (ValueError) before taking the lock
+        options = {"weeks": self.event_model.check_weeks(params.get("weeks", 1))}
+        checks = {
+            "max_weekly_shifts": self.event_model.check_max_weekly_shifts,
+            "min_rest_hours": self.event_model.check_min_rest_hours,
+        }
+        for name, check in checks.items():
+            if params.get(name) is not None:
+                options[name] = check(params[name])
+        # Two concurrent runs would insert the same week twice.
+        with self._schedule_lock:
+            next_week = self.event_model.generate_next_week(*self.schedule_state, **options)
+            created_count = self.event_model.insert_into_mongo(next_week)
+        return {
+            "message": "Weekly scheduling completed",
+            "createdCount": created_count,
+            "log": self.schedule_log,
+        }
+
+    # --- Boucle JSON-lines ---
+    def dispatch(self, request):
+        method = request.get("method")
+        start = time.perf_counter()
+        result, error = None, None
+        try:
+            handler = self.handlers.get(method)
+            if handler is None:
+                reason = self.load_errors.get(method, "unknown method")
+                raise LookupError(f"Method '{method}' unavailable: {reason}")
+            result = handler(request.get("params") or {})
+        except Exception as exc:
+            error = {"type": type(exc).__name__, "message": str(exc)}
+        latency_ms = (time.perf_counter() - start) * 1000
+        self.stats.record(method, latency_ms, error is None)
+        return {
+            "id": request.get("id"),
+            "result": result,
+            "error": error,
+            "latency_ms": round(latency_ms, 3),
+        }
+
+    def serve(self, stdin, stdout):
+        write_lock = threading.Lock()
+
+        def emit(message):
+            line = json.dumps(message, ensure_ascii=False, default=str)
+            with write_lock:
+                stdout.write(line + "\n")
+                stdout.flush()
+
+        def handle(request):
+            emit(self.dispatch(request))
+
+        emit({"event": "ready", "load_ms": self.load_times, "load_errors": self.load_errors})
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for line in stdin:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    request = json.loads(line)
+                except json.JSONDecodeError as exc:
+                    emit({"id": None, "result": None, "latency_ms": 0,
+                          "error": {"type": "JSONDecodeError", "message": str(exc)}})
+                    continue
+                pool.submit(handle, request)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Resident ML inference server (JSON lines on stdin/stdout)")
+    parser.add_argument("--models", default=",".join(ALL_MODELS),
+                        help="comma-separated subset of: " + ", ".join(ALL_MODELS))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("ML_SERVER_WORKERS", "4")))
+    args = parser.parse_args(argv)
+
+    models = [m.strip() for m in args.models.split(",") if m.strip()]
+    unknown = sorted(set(models) - set(ALL_MODELS))
+    if unknown:
+        parser.error(f"unknown models: {', '.join(unknown)}")
+
+    # stdout is reserved for protocol lines; route every print() to stderr.
+    protocol_out = sys.stdout
+    sys.stdout = sys.stderr
+
+    server = InferenceServer(models=models, workers=args.workers)
+    server.load()
+    server.serve(sys.stdin, protocol_out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Stage timing, and overlap of independent I/O stages, for the ML scripts.
+
+``StageTimer.stage(name)`` records when a stage starts and ends (relative
+to the timer creation) and on which thread.  ``StageTimer.submit`` runs a
+stage in a small shared thread pool and returns its ``Future``: Mongo
+queries, file reads and artifact loads spend their time in pymongo
+sockets, file I/O or native code that releases the GIL, so they overlap
+with each other and with the caller's CPU work.
+
+``report()`` shows the gain: ``wall_s`` is the time from the first stage
+start to the last stage end, ``serial_s`` the sum of the stage durations
+(what running them one after the other would cost), ``overlap_s`` their
+difference.  Stages must not nest, or ``serial_s`` counts them twice.
+Blocking on a background stage goes through ``wait(name, future)``: the
+wait is listed (``"wait": true``) but not added to ``serial_s``, since the
+stage it waits for is already counted.
+
+    ML_IO_WORKERS   threads of the shared pool (4 by default)
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+IO_WORKERS = int(os.getenv("ML_IO_WORKERS", "4"))
+
+_pool_lock = threading.Lock()
+_pool = None
+
+
+def io_pool():
+    """Process-wide thread pool for I/O stages, created on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=IO_WORKERS, thread_name_prefix="ml-io")
+        return _pool
+
+
+class StageTimer:
+    def __init__(self):
+        self.t0 = time.perf_counter()
+        self.stages = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name, wait=False):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            with self._lock:
+                self.stages.append((name, start - self.t0, end - self.t0,
+                                    threading.current_thread().name, wait))
+
+    def wait(self, name, future):
+        """``future.result()``, recorded as a wait (excluded from ``serial_s``)."""
+        with self.stage(name, wait=True):
+            return future.result()
+
+    def submit(self, name, fn, *args, **kwargs):
+        """Run ``fn(*args, **kwargs)`` as stage ``name`` in the I/O pool; returns a Future."""
+        def run():
+            with self.stage(name):
+                return fn(*args, **kwargs)
+        return io_pool().submit(run)
+
+    def report(self):
+        with self._lock:
+            stages = sorted(self.stages, key=lambda s: s[1])
+        if not stages:
+            return {"wall_s": 0.0, "serial_s": 0.0, "overlap_s": 0.0, "stages": []}
+        wall = max(end for _, _, end, _, _ in stages) - stages[0][1]
+        serial = sum(end - start for _, start, end, _, wait in stages if not wait)
+        return {
+            "wall_s": round(wall, 4),
+            "serial_s": round(serial, 4),
+            "overlap_s": round(serial - wall, 4),
+            "stages": [
+                {"name": name, "start_s": round(start, 4), "end_s": round(end, 4),
+                 "seconds": round(end - start, 4), "thread": thread, **({"wait": True} if wait else {})}
+                for name, start, end, thread, wait in stages
+            ],
+        }
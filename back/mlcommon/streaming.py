@@ -0,0 +1,26 @@
+import json
+
+
+def iter_batches(cursor, batch_size):
+    """Group the documents of a cursor into lists of at most ``batch_size``."""
+    batch = []
+    for doc in cursor:
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def write_ndjson(records, out):
+    """Write one JSON object per line and flush, so readers can start early."""
+    for record in records:
+        out.write(json.dumps(record, ensure_ascii=False, default=str))
+        out.write("\n")
+    out.flush()
+
+
+def projection(fields):
+    """MongoDB projection keeping ``fields`` (``_id`` is always returned)."""
+    return {field: 1 for field in fields}
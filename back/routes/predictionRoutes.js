@@ -6,4 +6,8 @@ const predictionController = require('../controllers/predictionController');
 // Lance le script Python et renvoie la liste triée des patients
 router.get('/', predictionController.predictPatients);
 
+// GET /api/predictions/stream
+// Triage de chaque patient en NDJSON, envoyé au fil des lots (TrieXGB --stream)
+router.get('/stream', predictionController.streamTriage);
+
 module.exports = router;
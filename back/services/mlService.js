@@ -0,0 +1,147 @@
+// services/mlService.js
+//
+// Client for the resident Python inference server (mlcommon/server.py).
+// The server is spawned once and keeps the TrieML, WT, ChatBotMl and EventMl
+// models in memory; calls are JSON lines matched back to their promise by id.
+
+const { spawn } = require('child_process');
+const path      = require('path');
+const readline  = require('readline');
+
+const DEFAULT_TIMEOUT_MS = 15 * 60 * 1000;
+
+class PythonMlService {
+  constructor(options = {}) {
+    this.pythonExe = options.pythonExe
+      || process.env.ML_PYTHON
+      || (process.platform === 'win32' ? 'python' : 'python3');
+    this.script  = options.script || path.resolve(__dirname, '../mlcommon/server.py');
+    this.args    = options.args || [];
+    this.timeoutMs = options.timeoutMs || DEFAULT_TIMEOUT_MS;
+    this.child   = null;
+    this.ready   = null;
+    this.nextId  = 1;
+    this.pending = new Map();
+  }
+
+  start() {
+    if (this.child) return this.ready;
+
+    const child = spawn(this.pythonExe, [this.script, ...this.args], {
+      stdio: ['pipe', 'pipe', 'pipe'],
+    });
+    this.child = child;
+
+    this.ready = new Promise((resolve, reject) => {
+      const lines = readline.createInterface({ input: child.stdout });
+      lines.on('line', (line) => {
+        let message;
+        try {
+          message = JSON.parse(line);
+        } catch (err) {
+          console.warn('ML server: ignoring non-JSON line:', line);
+          return;
+        }
+        if (message.event === 'ready') {
+          if (Object.keys(message.load_errors || {}).length) {
+            console.warn('ML server loaded with errors:', message.load_errors);
+          }
+          resolve(message);
+          return;
+        }
+        this._settle(message);
+      });
+
+      child.on('error', (err) => {
+        console.error(`ML server spawn error: ${err}`);
+        this._reset(err);
+        reject(err);
+      });
+
+      child.on('exit', (code, signal) => {
+        const err = new Error(`ML server exited (code ${code}, signal ${signal})`);
+        this._reset(err);
+        reject(err);
+      });
+    });
+    // Avoid an unhandled rejection when nobody is waiting on start().
+    this.ready.catch(() => {});
+
+    // EPIPE when the server closed stdin or died mid-write: fail the pending
+    // calls instead of crashing the backend with an unhandled 'error' event.
+    child.stdin.on('error', (err) => {
+      console.error(`ML server stdin error: ${err}`);
+      if (this.child === child) this._reset(err);
+    });
+
+    child.stderr.on('data', (data) => {
+      console.warn(`ML server: ${data.toString().trimEnd()}`);
+    });
+
+    return this.ready;
+  }
+
+  async call(method, params = {}, { timeoutMs } = {}) {
+    await this.start();
+
+    const id = this.nextId++;
+    return new Promise((resolve, reject) => {
+      const timer = setTimeout(() => {
+        this.pending.delete(id);
+        reject(Object.assign(new Error(`ML call '${method}' timed out`), { code: 'ETIMEDOUT' }));
+      }, timeoutMs || this.timeoutMs);
+
+      // _reset() may have dropped the child since start() resolved
+      if (!this.child || !this.child.stdin.writable) {
+        clearTimeout(timer);
+        reject(new Error(`ML server unavailable for '${method}'`));
+        return;
+      }
+      this.pending.set(id, { resolve, reject, timer });
+      this.child.stdin.write(JSON.stringify({ id, method, params }) + '\n');
+    });
+  }
+
+  stop() {
+    if (this.child) this.child.kill();
+  }
+
+  _settle(message) {
+    const entry = this.pending.get(message.id);
+    if (!entry) return;
+    this.pending.delete(message.id);
+    clearTimeout(entry.timer);
+    if (message.error) {
+      entry.reject(Object.assign(new Error(message.error.message), {
+        type: message.error.type,
+        latencyMs: message.latency_ms,
+      }));
+    } else {
+      entry.resolve(message.result);
+    }
+  }
+
+  _reset(err) {
+    for (const entry of this.pending.values()) {
+      clearTimeout(entry.timer);
+      entry.reject(err);
+    }
+    this.pending.clear();
+    this.child = null;
+  }
+}
+
+let instance = null;
+
+// Shared service used by the controllers; spawned on first use.
+function getMlService() {
+  if (!instance) instance = new PythonMlService();
+  return instance;
+}
+
+// Replace the shared service, e.g. with services/mlServiceStub.js in tests.
+function setMlService(service) {
+  instance = service;
+}
+
+module.exports = { PythonMlService, getMlService, setMlService };
@@ -0,0 +1,43 @@
+// services/mlServiceStub.js
+//
+// In-process stand-in for the Python inference server, for controller tests:
+//
+//   const { setMlService } = require('../services/mlService');
+//   const stub = new MlServiceStub({ chat: ({ query }) => ({ response: `echo ${query}` }) });
+//   setMlService(stub);
+//
+// Handlers may return a value or a promise, or throw to simulate a server
+// error.  Every call is recorded in `stub.calls`.
+
+const DEFAULT_HANDLERS = {
+  ping:        () => ({ models: { triage: true, wait_time: true, chat: true, schedule: true } }),
+  triage:      () => [],
+  triage_wait: () => [],
+  wait_time:   () => ({ validation: { mse: 0, r2: 1 }, test: null, predictions: [] }),
+  chat:        ({ query }) => ({ response: `Stub response for: ${query}` }),
+  schedule:    () => ({ message: 'Weekly scheduling completed', createdCount: 0, log: '' }),
+};
+
+class MlServiceStub {
+  constructor(handlers = {}) {
+    this.handlers = { ...DEFAULT_HANDLERS, ...handlers };
+    this.calls = [];
+  }
+
+  start() {
+    return Promise.resolve({ event: 'ready', load_ms: {}, load_errors: {} });
+  }
+
+  async call(method, params = {}) {
+    this.calls.push({ method, params });
+    const handler = this.handlers[method];
+    if (!handler) {
+      throw Object.assign(new Error(`Method '${method}' unavailable: unknown method`), { type: 'LookupError' });
+    }
+    return handler(params);
+  }
+
+  stop() {}
+}
+
+module.exports = { MlServiceStub };
@@ -0,0 +1,52 @@
+// services/ndjsonStream.js
+//
+// Runs one of the ML scripts in --stream mode and hands every NDJSON record to
+// `onRecord` as soon as its line is printed, instead of buffering the whole
+// stdout and calling JSON.parse once at the end.
+//
+//   await streamPythonRecords(path.join(__dirname, '../TrieML/TrieXGB.py'),
+//                             ['--stream', '--fields', 'status'],
+//                             (patient) => { ... });
+//
+// Pass an AbortSignal as `signal` to kill the script early (e.g. when the
+// HTTP client goes away); the promise then rejects with an AbortError.
+
+const { spawn }  = require('child_process');
+const readline   = require('readline');
+
+function streamPythonRecords(script, args, onRecord, { pythonExe, signal } = {}) {
+  const exe = pythonExe
+    || process.env.ML_PYTHON
+    || (process.platform === 'win32' ? 'python' : 'python3');
+
+  return new Promise((resolve, reject) => {
+    const child = spawn(exe, [script, ...args], { signal });
+    let count = 0;
+    let stderr = '';
+    let failed = null;
+
+    const lines = readline.createInterface({ input: child.stdout });
+    lines.on('line', (line) => {
+      if (!line.trim() || failed) return;
+      try {
+        onRecord(JSON.parse(line));
+        count += 1;
+      } catch (err) {
+        failed = err;
+        child.kill();
+      }
+    });
+
+    child.stderr.on('data', (data) => { stderr += data.toString(); });
+    child.on('error', reject);
+    child.on('close', (code) => {
+      if (failed) return reject(failed);
+      if (code !== 0) {
+        return reject(Object.assign(new Error(`${script} exited with code ${code}`), { details: stderr.trim() }));
+      }
+      resolve({ count, log: stderr.trim() });
+    });
+  });
+}
+
+module.exports = { streamPythonRecords };
@@ -0,0 +1,11 @@
+# back/tests/conftest.py
+#
+# The ML scripts are run by path, not installed: make ``mlcommon``, the
+# ChatBotMl modules and event_model importable the same way the scripts do.
+import os
+import sys
+
+BACK_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACK_DIR)
+sys.path.insert(0, os.path.join(BACK_DIR, "ChatBotMl", "src"))
+sys.path.insert(0, os.path.join(BACK_DIR, "EventMl"))
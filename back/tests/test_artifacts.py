@@ -0,0 +1,35 @@
+import os
+import stat
+
+import pytest
+
+from mlcommon.artifacts import fingerprint, load_artifact, save_artifact
+
+
+@pytest.fixture
+def umask_022():
+    previous = os.umask(0o022)
+    yield
+    os.umask(previous)
+
+
+def test_save_artifact_uses_umask_permissions(tmp_path, umask_022):
+    path = tmp_path / "artifacts" / "model.joblib"
+    save_artifact(str(path), {"fingerprint": "fp", "model": [1, 2, 3]})
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o644
+    assert [p.name for p in path.parent.iterdir()] == ["model.joblib"]  # no temp file left
+
+
+def test_save_artifact_replaces_and_keeps_permissions(tmp_path, umask_022):
+    path = tmp_path / "model.joblib"
+    save_artifact(str(path), {"fingerprint": "a"})
+    save_artifact(str(path), {"fingerprint": "b"})
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o644
+    assert load_artifact(str(path), "b") == {"fingerprint": "b"}
+
+
+def test_load_artifact_rejects_stale_or_missing(tmp_path):
+    path = tmp_path / "model.joblib"
+    assert load_artifact(str(path), "fp") is None
+    save_artifact(str(path), {"fingerprint": fingerprint(params={"depth": 3})})
+    assert load_artifact(str(path), fingerprint(params={"depth": 4})) is None
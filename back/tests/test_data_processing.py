@@ -0,0 +1,110 @@
+import os
+
+import numpy as np
+import pytest
+
+from data_processing import load_dataset, preprocess_data
+
+CSV_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        "ChatBotMl", "data", "final_chatbot_medical_dataset_multilingual.csv")
+TEXT_COLUMNS = ['Symptom_EN', 'Symptom_FR', 'Symptom_AR', 'Illness_EN', 'Illness_FR', 'Illness_AR',
+                'Recommended_Medication', 'Doctor_Specialty']
+
+
+def reference_preprocess(df):
+    """The row-by-row preprocess_data that the vectorized version replaced."""
+    symptom_to_response = {}
+    illness_to_med = {}
+    symptoms_list = []
+    serious_symptom_to_doctor = {}
+    illness_to_serious_info = {}
+
+    for _, row in df.iterrows():
+        symptom_en = str(row.get('Symptom_EN', '')).strip().lower()
+        symptom_fr = str(row.get('Symptom_FR', '')).strip().lower()
+        symptom_ar = str(row.get('Symptom_AR', '')).strip().lower()
+        illness_en = str(row.get('Illness_EN', '')).strip().lower()
+        illness_fr = str(row.get('Illness_FR', '')).strip().lower()
+        illness_ar = str(row.get('Illness_AR', '')).strip().lower()
+        medication = str(row.get('Recommended_Medication', '')).strip().lower()
+        is_serious = bool(row.get('Serious', False))
+        doctor_specialty = str(row.get('Doctor_Specialty', '')).strip().lower() if is_serious else None
+
+        for symptom in [symptom_en, symptom_fr, symptom_ar]:
+            if symptom and symptom not in symptoms_list:
+                symptoms_list.append(symptom)
+
+        for symptom in [symptom_en, symptom_fr, symptom_ar]:
+            if not symptom:
+                continue
+            if is_serious:
+                symptom_to_response[symptom] = {'type': 'doctor', 'response': doctor_specialty}
+                serious_symptom_to_doctor[symptom] = doctor_specialty
+            else:
+                if symptom not in symptom_to_response or symptom_to_response[symptom]['type'] != 'medication':
+                    symptom_to_response[symptom] = {'type': 'medication', 'response': []}
+                if not isinstance(symptom_to_response[symptom]['response'], list):
+                    symptom_to_response[symptom]['response'] = []
+                if medication and medication not in symptom_to_response[symptom]['response']:
+                    symptom_to_response[symptom]['response'].append(medication)
+
+        for illness in [illness_en, illness_fr, illness_ar]:
+            if not illness:
+                continue
+            if illness not in illness_to_med:
+                illness_to_med[illness] = []
+            if medication and medication not in illness_to_med[illness]:
+                illness_to_med[illness].append(medication)
+
+        for illness in [illness_en, illness_fr, illness_ar]:
+            if not illness:
+                continue
+            if is_serious:
+                illness_to_serious_info[illness] = {'serious': True, 'specialty': doctor_specialty}
+            elif illness not in illness_to_serious_info:
+                illness_to_serious_info[illness] = {'serious': False, 'specialty': None}
+
+    return symptom_to_response, illness_to_med, symptoms_list, serious_symptom_to_doctor, illness_to_serious_info
+
+
+def assert_same_knowledge_base(got, expected):
+    # dict order matters too: the matchers scan symptoms and illnesses in order
+    for got_part, expected_part in zip(got, expected):
+        if isinstance(expected_part, dict):
+            assert list(got_part.items()) == list(expected_part.items())
+        else:
+            assert got_part == expected_part
+
+
+@pytest.fixture(scope="module")
+def dataset():
+    return load_dataset(CSV_PATH)
+
+
+def perturbed(df, seed):
+    """Resampled rows with blanks/NaN, padding, case changes, flipped Serious and dropped columns."""
+    rng = np.random.default_rng(seed)
+    df = df.sample(n=int(rng.integers(1, 400)), replace=True, random_state=seed).reset_index(drop=True)
+    for col in TEXT_COLUMNS:
+        values = df[col].astype(object).to_numpy().copy()
+        blank = rng.random(len(df)) < 0.1
+        padded = rng.random(len(df)) < 0.1
+        upper = rng.random(len(df)) < 0.1
+        values[blank] = np.array(['', '  ', np.nan], dtype=object)[rng.integers(0, 3, int(blank.sum()))]
+        values[padded] = [f'  {v}\t' for v in values[padded]]
+        values[upper] = [v.upper() if isinstance(v, str) else v for v in values[upper]]
+        df[col] = values
+    flip = rng.random(len(df)) < 0.3
+    df['Serious'] = np.where(flip, ~df['Serious'], df['Serious'])
+    dropped = [col for col in TEXT_COLUMNS + ['Serious'] if rng.random() < 0.1]
+    return df.drop(columns=dropped)
+
+
+def test_preprocess_data_matches_reference_on_shipped_csv(dataset):
+    assert_same_knowledge_base(preprocess_data(dataset), reference_preprocess(dataset))
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_preprocess_data_matches_reference_on_perturbed_samples(dataset, seed):
+    df = perturbed(dataset, seed)
+    assert_same_knowledge_base(preprocess_data(df), reference_preprocess(df))
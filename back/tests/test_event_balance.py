@@ -0,0 +1,79 @@
+import random
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+
+from event_model import MAX_WEEKLY_SHIFTS, SHIFTS, SHIFTS_HOURS, balance_assignments
+
+FIRST_DAY = datetime(2025, 3, 3)
+ROLES = (("assignedDoctors", 6), ("assignedNurses", 9))
+
+
+def synthetic_roster(weeks, seed=0):
+    """Staff per role and one event per (day, shift) with random predicted assignments."""
+    rng = random.Random(seed)
+    staff = {key: [ObjectId() for _ in range(n)] for key, n in ROLES}
+    events = []
+    for d in range(7 * weeks):
+        day = FIRST_DAY + timedelta(days=d)
+        for sh in SHIFTS:
+            h0, h1 = SHIFTS_HOURS[sh]
+            ev = {
+                'start': day.replace(hour=h0),
+                'end': (day + timedelta(days=1) if h1 == 24 else day).replace(hour=h1 % 24),
+                'shift': sh,
+            }
+            for key, people in staff.items():
+                # ids come back from the model as strings, sometimes repeated
+                picked = rng.sample(people, rng.randint(0, 4))
+                ev[key] = [str(p) for p in picked + picked[:1]]
+            events.append(ev)
+    return events, staff
+
+
+def shifts_by_person(events, key):
+    worked = defaultdict(list)
+    for ev in events:
+        for person in ev[key]:
+            worked[person].append((ev['start'], ev['end']))
+    return worked
+
+
+@pytest.mark.parametrize("weeks", [1, 4])
+@pytest.mark.parametrize("max_weekly_shifts,min_rest_hours", [(7, 8), (MAX_WEEKLY_SHIFTS, 8), (14, 0)])
+def test_balance_assignments_constraints(weeks, max_weekly_shifts, min_rest_hours):
+    events, staff = synthetic_roster(weeks, seed=weeks)
+    balance_assignments(events, staff['assignedDoctors'], staff['assignedNurses'],
+                        max_weekly_shifts=max_weekly_shifts, min_rest_hours=min_rest_hours)
+    min_rest = timedelta(hours=min_rest_hours)
+
+    for key, people in staff.items():
+        for ev in events:
+            # no duplicates, users' ObjectId returned for string predictions
+            assert len(ev[key]) == len(set(ev[key]))
+            assert all(isinstance(p, ObjectId) for p in ev[key])
+
+        # full daily coverage
+        on_day = defaultdict(set)
+        for ev in events:
+            on_day[ev['start'].date()].update(ev[key])
+        assert len(on_day) == 7 * weeks
+        for day, present in on_day.items():
+            assert present >= set(people), (key, day)
+
+        for person, shifts in shifts_by_person(events, key).items():
+            # weekly cap
+            per_week = Counter((start.date() - FIRST_DAY.date()).days // 7 for start, _ in shifts)
+            assert max(per_week.values()) <= max_weekly_shifts, (key, person, per_week)
+            # minimum rest between consecutive shifts
+            shifts.sort()
+            for (_, prev_end), (start, _) in zip(shifts, shifts[1:]):
+                assert start - prev_end >= min_rest, (key, person, prev_end, start)
+
+
+def test_balance_assignments_rejects_cap_below_a_week():
+    events, staff = synthetic_roster(1)
+    with pytest.raises(ValueError):
+        balance_assignments(events, staff['assignedDoctors'], staff['assignedNurses'], max_weekly_shifts=6)
@@ -0,0 +1,115 @@
+import os
+import random
+
+import numpy as np
+import pytest
+from rapidfuzz import fuzz
+
+from data_processing import load_dataset, preprocess_data
+from matchers import FuzzyMatcher, IllnessMatcher
+
+CSV_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        "ChatBotMl", "data", "final_chatbot_medical_dataset_multilingual.csv")
+N_QUERIES = 3000
+FILLER = ["i have", "my child has", "j'ai", "depuis hier", "and", "since", "what about", "عندي", "please help", ""]
+
+
+# The linear scans the matchers replaced in MedicalChatbot
+def reference_illness(illnesses, text):
+    for illness in illnesses:
+        if illness in text:
+            return illness
+    return None
+
+
+def reference_fuzzy(candidates, query, threshold=90):
+    for candidate in candidates:
+        if fuzz.ratio(query, candidate) > threshold:
+            return candidate
+    return None
+
+
+def reference_best(candidates, query, threshold=90):
+    scores = [fuzz.ratio(query, candidate) for candidate in candidates]
+    best = int(np.argmax(scores))
+    return best if scores[best] > threshold else -1
+
+
+def mutate(rng, word):
+    """``word`` with up to two character edits (drop, double, swap, replace)."""
+    chars = list(word)
+    for _ in range(rng.randint(0, 2)):
+        if not chars:
+            break
+        i = rng.randrange(len(chars))
+        edit = rng.choice("ddsr")
+        if edit == "d" and len(chars) > 1:
+            del chars[i]
+        elif edit == "s" and i + 1 < len(chars):
+            chars[i], chars[i + 1] = chars[i + 1], chars[i]
+        elif edit == "r":
+            chars[i] = rng.choice("abcdefghijklmnopqrstuvwxyz")
+        else:
+            chars.insert(i, chars[i])
+    return "".join(chars)
+
+
+@pytest.fixture(scope="module")
+def vocabulary():
+    _, illness_to_med, symptoms_list, _, _ = preprocess_data(load_dataset(CSV_PATH))
+    return list(illness_to_med), symptoms_list
+
+
+@pytest.fixture(scope="module")
+def queries(vocabulary):
+    """Sentences around 0-3 (possibly misspelt) illnesses and symptoms, plus bare symptoms."""
+    illnesses, symptoms = vocabulary
+    rng = random.Random(0)
+    out = []
+    for _ in range(N_QUERIES // 2):
+        words = [rng.choice(FILLER)]
+        for _ in range(rng.randint(0, 3)):
+            word = rng.choice(illnesses if rng.random() < 0.5 else symptoms)
+            words += [mutate(rng, word) if rng.random() < 0.5 else word, rng.choice(FILLER)]
+        out.append(" ".join(w for w in words if w))
+        out.append(mutate(rng, rng.choice(symptoms)))
+    return out
+
+
+def test_illness_matcher_matches_linear_scan(vocabulary, queries):
+    illnesses, _ = vocabulary
+    matcher = IllnessMatcher(illnesses)
+    assert [matcher.find(q) for q in queries] == [reference_illness(illnesses, q) for q in queries]
+
+
+def test_illness_matcher_overlapping_names():
+    # small alphabet: names that are prefixes, suffixes and infixes of each other
+    rng = random.Random(1)
+    for _ in range(200):
+        illnesses = list(dict.fromkeys("".join(rng.choice("ab") for _ in range(rng.randint(1, 5)))
+                                       for _ in range(rng.randint(1, 8))))
+        matcher = IllnessMatcher(illnesses)
+        for _ in range(20):
+            text = "".join(rng.choice("abc") for _ in range(rng.randint(0, 12)))
+            assert matcher.find(text) == reference_illness(illnesses, text), (illnesses, text)
+
+
+def test_fuzzy_matcher_matches_first_candidate_loop(vocabulary, queries):
+    _, symptoms = vocabulary
+    matcher = FuzzyMatcher(symptoms)
+    for threshold in (80, 90):
+        got = [matcher.match(q, threshold) for q in queries]
+        assert got == [reference_fuzzy(symptoms, q, threshold) for q in queries]
+
+
+def test_fuzzy_matcher_best_matches(vocabulary, queries):
+    _, symptoms = vocabulary
+    best, _ = FuzzyMatcher(symptoms).best_matches(queries, 80)
+    assert best.tolist() == [reference_best(symptoms, q, 80) for q in queries]
+
+
+def test_matchers_without_candidates():
+    assert IllnessMatcher([]).find("fever") is None
+    assert FuzzyMatcher([]).match("fever") is None
+    best, scores = FuzzyMatcher([]).best_matches(["fever"])
+    assert best.tolist() == [-1]